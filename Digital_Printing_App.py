@@ -2,18 +2,46 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from streamlit_gsheets import GSheetsConnection
-from datetime import timedelta, datetime
+from datetime import datetime
 import ssl
+import functools
+import math
 import urllib.parse  # Added for WhatsApp URL encoding
+from config import (DATA_REFRESH_SECONDS, JOURNAL_PATH, SYNC_INTERVAL_SECONDS,
+                    STORAGE_BACKEND, PERF_ENABLED, PERF_LOG, PERF_WINDOW, API_PORT)
+from data_cache import DataCache, Snapshot
+from aggregates import get_aggregates
+from date_index import get_date_index
+from metrics import calculate_ytd_downtime
+from charts import GRANULARITIES, get_chart_series, get_daily_series, get_production_figure
+from forecast import load_targets, get_forecast
+from sheets_io import KEY_COLUMN, diff_rows, parse_keys, DuplicateRowError, LockedRowError, ConflictError
+from storage import make_backend
+from perf import PerfRecorder
+from paging import get_sorted_archive, filter_rows, page_of, recent_rows
+from issues import IssueIndex, get_issue_analytics
+from downtime_timer import event_duration, total_downtime, format_timedelta, ticker_html
+from journal import CONFLICT, WriteJournal, SyncWorker
+from rollups import push_with_rollups, scope_mask, with_rollups
+from bulk_import import read_table, validate_import, plan_import
+from reports import IMAGE_REPORTS_AVAILABLE, get_report_summary, render, render_html
+from metrics_api import MetricsApi, start_metrics_api
 
 # --- 1. CONFIG & PAGE SETUP ---
-FORM_TITLE = "Digital Printing Production Data Entry (2026)"
-SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/1RmdsVRdN8Es6d9rAZVt8mUOLQyuz0tnHd8rkiXKVlTM/"
-SHEET_NAME = "Data"
-ANNUAL_TARGET = 9680000
+CURRENT_YEAR = datetime.now().year
+FORM_TITLE = f"Digital Printing Production Data Entry ({CURRENT_YEAR})"
 
 st.set_page_config(layout="wide", page_title=FORM_TITLE)
 
+# Rerun timing; ?perf=1 also shows the admin panel at the bottom of the page
+@st.cache_resource
+def get_perf_recorder():
+    return PerfRecorder(window=PERF_WINDOW, log_lines=PERF_LOG)
+
+perf_recorder = get_perf_recorder()
+show_perf_panel = st.query_params.get("perf") == "1"
+perf = perf_recorder.start_run(PERF_ENABLED or PERF_LOG or show_perf_panel)
+
 # SSL Bypass
 try:
     ssl._create_default_https_context = ssl._create_unverified_context
@@ -27,182 +55,258 @@ try:
 except ImportError:
     PLOTLY_AVAILABLE = False
 
+# st.fragment on current Streamlit, st.experimental_fragment on older releases
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+def timed_fragment(fn):
+    # A fragment rerun skips the page run (already finished), so every execution
+    # is timed as its own run, named after the fragment; fn gets that run first
+    @functools.wraps(fn)
+    def body(*args, **kwargs):
+        run = perf_recorder.start_run(perf.enabled, total=f"fragment: {fn.__name__}")
+        try:
+            return fn(run, *args, **kwargs)
+        finally:
+            run.finish()
+    return fragment(body)
+
 # --- 3. CONSTANTS & COLUMNS ---
-ALL_COLUMNS = [
-    'ProductionDate', 'NoOfJobs', 'NoOfTrials', 'DailyProductionTotal',
-    'WeeklyProductionTotal', 'MonthlyProductionTotal', 'YearlyProductionTotal',
-    'YTD_Jobs_Total', 'CleanMachineAm', 'CleanMachinePm', 'CleanMachineTotal',
-    'IssueResolutionTotal', 'ProductionIssues_1', 'ProductionIssues_2',
-    'ProductionIssues_3', 'ProductionIssues_4', 'ProductionIssues_5',
-    'ProductionIssues_6', 'ProductionIssues_7', 'ProductionIssues_8',
-    'ProductionIssues_9', 'ProductionIssues_10',
-    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
-    'TempDate'
-]
-
-ISSUE_CATEGORIES = ['NoIssue', 'Adjust voltage', 'Admin/Meeting', 'Air pipe burst', 'Arrived at work late',
-    'Barcode scans (break into prod to do scan)', 'Centre a/w on web (moved as speed changed)',
-    'Change degassing unit', 'Check multiple jobs for colour', 'Clean Heads am/pm (1 hr 30 min)',
-    'Clean rollers (extensive clean)', 'Corona issues', 
-    'Defective laminate causes infeed height to trigger', 'Fire drill',
-    'Flush heads, Fill_Cleaner, Print, Refill_Ink', 'Flush printer and replace heads',
-    'General: Smudging/puddling etc.', 'Generator (big) no compressed air', 'HMI not responding',
-    'Infeed trigger due to encoder', 'Ink (G2 vs G4): rework colours', 'Ink management system error',
-    'Left work early', 'Lines: 100 black head', 'Lines: 100 cyan head', 'Lines: 100 magenta head',
-    'Lines: 100 yellow head', 'Lines: 200 black head', 'Lines: 200 cyan head', 'Lines: 200 magenta head',
-    'Lines: 200 yellow head', 'Lines: Print incorrect direction + rewind', 'Manifold card out for repair',
-    'Material change', 'Material change ABL White to ABL Silver', 'Material change ABL to PBL', 
-    'Material change PBL to ABL', 'Meeting', 'PUBLIC HOLIDAY', 'Pack trials', 'Planned Maintenance',
-    'Print slowly due to banding', 'Print trial rolls for varnish/foil', 
-    'Printing on hold due to backlog on SAESA', 
-    'Registration issues (profile auto changed in run)', 'Rollers bouncing', 
-    'Set up multiple trials for trial run', 'Software issue relating to heads',
-    'Spring loose next to encoder', 'Stitch print heads', 
-    'TeaAndLunchBreaks_Ashley not a work', 'TeaAndLunchBreaks_Zahyaan not at work',
-    'Training', 'Trial options for Client meeting', 'Trials: 1 hr', 'Trials: 2 hr', 'Trials: 3 hr', 
-    'Trials: 4 hr', 'Trials: 5 hr', 'Trials: 6 hr', 'Trials: 8 hr', 'Trials: 9 hr', 
-    'Troubleshoot issues with yellow print heads', 'UV lamp issues', 
-    'Vertical white, unprinted bands in yellow heads', 'Web tension error (rollers clamping)',
-    'Worked in another day in lieu of Public Holiday',]
+# Column lists and dtypes live in schema.py so the helper modules share them
+from schema import ALL_COLUMNS, ISSUE_CATEGORIES, DERIVED_COLUMNS, prepare_frame, to_sheet_frame
 
 # --- 4. SESSION STATE ---
 if 'form_version' not in st.session_state: st.session_state.form_version = 0
-if 'accumulated_downtime' not in st.session_state: st.session_state.accumulated_downtime = timedelta(0)
-if 'timer_start_time' not in st.session_state: st.session_state.timer_start_time = None
-if 'is_timer_running' not in st.session_state: st.session_state.is_timer_running = False
+if 'downtime_events' not in st.session_state: st.session_state.downtime_events = []
 
 # --- 5. DATA LOADING ---
-conn = st.connection("gsheets", type=GSheetsConnection)
+perf.lap("5. data loading")
+@st.cache_resource
+def get_backend():
+    # DPP_STORAGE_BACKEND picks Google Sheets or the local SQLite store
+    conn = st.connection("gsheets", type=GSheetsConnection) if STORAGE_BACKEND == 'sheets' else None
+    return make_backend(STORAGE_BACKEND, conn=conn)
+
+backend = get_backend()
+
+@st.cache_resource
+def get_data_cache():
+    # Process-wide: every session shares one snapshot instead of re-reading the sheet per rerun
+    cache = DataCache(
+        loader=backend.read,
+        prepare=prepare_frame,
+        refresh_seconds=DATA_REFRESH_SECONDS,
+    )
+    cache.start()
+    return cache
+
+data_cache = get_data_cache()
 
 def load_data():
     try:
-        data = conn.read(spreadsheet=SPREADSHEET_URL, worksheet=SHEET_NAME, ttl=0)
-        if data is not None and not data.empty:
-            data.columns = [c.strip() for c in data.columns]
-            data['ProductionDate_Parsed'] = pd.to_datetime(data['ProductionDate'], errors='coerce')
-            return data
-        return pd.DataFrame(columns=ALL_COLUMNS)
+        snapshot = data_cache.snapshot()
+        if data_cache.last_error is not None:
+            st.warning(f"⚠️ Reload failed, showing data loaded at {datetime.fromtimestamp(snapshot.loaded_at):%H:%M}: {data_cache.last_error}")
+        return snapshot
     except Exception as e:
         st.error(f"🚨 Connection Failed: {e}")
-        return pd.DataFrame(columns=ALL_COLUMNS)
-
-df_main = load_data()
+        return Snapshot(pd.DataFrame(columns=ALL_COLUMNS), version=0, fingerprint="0:0")
+
+with perf.span("load_data"):
+    snapshot = load_data()
+df_main = snapshot.df
+# Read-only years (configured, plus any the storage layer has archived); frozen ones never change again
+LOCKED_YEARS = backend.locked_years()
+FROZEN_YEARS = backend.frozen_years()
+
+@st.cache_resource
+def get_sync_worker():
+    # Submits land in a local SQLite journal first; this worker pushes them to the backend,
+    # filling running totals from the stored rows (and shifting later ones) as it writes
+    worker = SyncWorker(WriteJournal(JOURNAL_PATH), functools.partial(push_with_rollups, backend),
+                        interval=SYNC_INTERVAL_SECONDS, on_synced=data_cache.invalidate)
+    worker.start()
+    return worker
+
+sync_worker = get_sync_worker()
+journal = sync_worker.journal
 
 # --- 6. CALCULATIONS ---
-def calculate_ytd_metrics(selected_date, historical_df):
-    if historical_df.empty: return 0, 0, 0
-    sel_dt = pd.to_datetime(selected_date).normalize()
-    year_start = pd.to_datetime(f"{sel_dt.year}-01-01")
-    ytd_mask = (historical_df['ProductionDate_Parsed'] >= year_start) & (historical_df['ProductionDate_Parsed'] < sel_dt)
-    
-    prod = pd.to_numeric(historical_df.loc[ytd_mask, 'DailyProductionTotal'], errors='coerce').sum()
-    jobs = pd.to_numeric(historical_df.loc[ytd_mask, 'NoOfJobs'], errors='coerce').sum()
-    trials = pd.to_numeric(historical_df.loc[ytd_mask, 'NoOfTrials'], errors='coerce').sum()
-    return int(prod), int(jobs), int(trials)
-
-def calculate_ytd_downtime(historical_df):
-    if historical_df.empty: return timedelta(0)
-    ytd_mask = historical_df['ProductionDate_Parsed'].dt.year == 2026
-    downtime_series = historical_df.loc[ytd_mask, 'IssueResolutionTotal']
-    total_td = timedelta(0)
-    for val in downtime_series.dropna():
-        try:
-            time_parts = str(val).split(':')
-            if len(time_parts) == 3:
-                h, m, s = map(int, time_parts)
-                total_td += timedelta(hours=h, minutes=m, seconds=s)
-            elif len(time_parts) == 2:
-                m, s = map(int, time_parts)
-                total_td += timedelta(minutes=m, seconds=s)
-        except (ValueError, TypeError):
-            continue
-    return total_td
-
-# Annual Totals
-total_2024, total_2025, ytd_2026, ytd_trials_2026 = 0, 0, 0, 0
-ytd_downtime_2026 = timedelta(0)
-
-if not df_main.empty:
-    total_2024 = pd.to_numeric(df_main[df_main['ProductionDate_Parsed'].dt.year == 2024]['DailyProductionTotal'], errors='coerce').sum()
-    total_2025 = pd.to_numeric(df_main[df_main['ProductionDate_Parsed'].dt.year == 2025]['DailyProductionTotal'], errors='coerce').sum()
-    ytd_2026 = pd.to_numeric(df_main[df_main['ProductionDate_Parsed'].dt.year == 2026]['DailyProductionTotal'], errors='coerce').sum()
-    ytd_trials_2026 = pd.to_numeric(df_main[df_main['ProductionDate_Parsed'].dt.year == 2026]['NoOfTrials'], errors='coerce').sum()
-    ytd_downtime_2026 = calculate_ytd_downtime(df_main)
+perf.lap("6. calculations")
+# Annual Totals (rolled up once per data version)
+aggregates = get_aggregates(snapshot)
+date_index = get_date_index(snapshot)
+total_prev2 = aggregates.total(CURRENT_YEAR - 2)
+total_prev1 = aggregates.total(CURRENT_YEAR - 1)
+ytd_current = aggregates.total(CURRENT_YEAR)
+ytd_trials_current = aggregates.total(CURRENT_YEAR, 'Trials')
+ytd_downtime_current = calculate_ytd_downtime(df_main, CURRENT_YEAR)
+# Targets per year (and press) from targets.json; forecast from the cached daily series
+targets = load_targets()
+forecast = get_forecast(snapshot, get_daily_series(snapshot, CURRENT_YEAR), CURRENT_YEAR, targets)
 
 # --- 7. UI: HEADER & METRICS ---
+perf.lap("7. header & metrics")
 st.title(FORM_TITLE)
 
 col1, col2, col3, col4, col5 = st.columns(5)
-col1.metric("📊 2024 Total", f"{total_2024:,.0f}")
-col2.metric("📊 2025 Total", f"{total_2025:,.0f}")
+col1.metric(f"📊 {CURRENT_YEAR - 2} Total", f"{total_prev2:,.0f}")
+col2.metric(f"📊 {CURRENT_YEAR - 1} Total", f"{total_prev1:,.0f}")
 
-progress = (ytd_2026 / ANNUAL_TARGET) * 100 if ANNUAL_TARGET > 0 else 0
-col3.metric("📈 2026 YTD Production", f"{ytd_2026:,.0f}", delta=f"{progress:.1f}% Target")
-col4.metric("🧪 2026 YTD Trials", f"{int(ytd_trials_2026)}")
+col3.metric(f"📈 {CURRENT_YEAR} YTD Production", f"{ytd_current:,.0f}", delta=f"{forecast.progress:.1f}% Target")
+col4.metric(f"🧪 {CURRENT_YEAR} YTD Trials", f"{int(ytd_trials_current)}")
 
-total_seconds = int(ytd_downtime_2026.total_seconds())
+total_seconds = int(ytd_downtime_current.total_seconds())
 hours, minutes = total_seconds // 3600, (total_seconds % 3600) // 60
-col5.metric("⏱️ 2026 YTD Downtime", f"{hours}h {minutes}m")
-
-# --- NEW: 2026 PRODUCTION CHART ---
+col5.metric(f"⏱️ {CURRENT_YEAR} YTD Downtime", f"{hours}h {minutes}m")
+
+f_col1, f_col2, f_col3, f_col4 = st.columns(4)
+f_col1.metric("🎯 Annual Target", f"{forecast.annual_target:,.0f}",
+              delta=f"{forecast.ytd - forecast.expected_to_date:+,.0f} vs pace")
+f_col2.metric(f"🏃 Run Rate ({max(forecast.run_rates, default=0)} working days)", f"{forecast.run_rate:,.0f}/day",
+              delta=f"{forecast.run_rate - forecast.daily_target:+,.0f} vs daily target")
+f_col3.metric("🔮 Projected Year-End", f"{forecast.projected:,.0f}",
+              delta="On track" if forecast.on_track else "Behind target", delta_color="normal" if forecast.on_track else "inverse")
+f_col4.metric("📅 Required per Working Day",
+              f"{forecast.required_daily:,.0f}" if np.isfinite(forecast.required_daily) else "Target missed",
+              delta=f"{forecast.working_days_left} working days left", delta_color="off")
+
+malformed = {col: n for col, n in df_main.attrs.get('malformed_durations', {}).items() if n}
+if malformed:
+    st.caption("⚠️ Unreadable durations skipped: " + ", ".join(f"{col} ({n})" for col, n in malformed.items()))
+
+# --- PRODUCTION CHART ---
+perf.lap("chart")
 st.write("---")
+
+# Series and figures are memoized per data version; changing the view only reruns this fragment
+@timed_fragment
+def production_chart(frag_perf):
+    g_col1, g_col2 = st.columns([1, 3])
+    years = sorted(set(aggregates.years) | {CURRENT_YEAR}, reverse=True)
+    year = g_col1.selectbox("Chart year", years + ["All years"], key="chart_year")
+    granularity = g_col2.radio("Granularity", list(GRANULARITIES), horizontal=True, key="chart_granularity")
+    year = None if year == "All years" else year
+    if get_chart_series(snapshot, year, granularity).empty:
+        st.info(f"No {year or ''} data available yet to display chart.")
+        return
+    title = f"{year or 'All Years'} {'Daily' if granularity == 'Day' else granularity + 'ly'} Production Performance"
+    daily_target = targets.for_year(year)['daily'] if year else None
+    fig = get_production_figure(snapshot, year, granularity, title, daily_target=daily_target)
+    with frag_perf.span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
 if PLOTLY_AVAILABLE and not df_main.empty:
-    chart_df = df_main[df_main['ProductionDate_Parsed'].dt.year == 2026].copy()
-    chart_df['DailyProductionTotal'] = pd.to_numeric(chart_df['DailyProductionTotal'], errors='coerce').fillna(0)
-    chart_df = chart_df.sort_values('ProductionDate_Parsed')
-
-    if not chart_df.empty:
-        fig = px.line(
-            chart_df, 
-            x='ProductionDate_Parsed', 
-            y='DailyProductionTotal',
-            title='2026 Daily Production Performance',
-            labels={'ProductionDate_Parsed': 'Date', 'DailyProductionTotal': 'Meters Produced'},
-            markers=True
-        )
-        fig.update_traces(line_color='#0083B8')
-        # CHANGED: Daily Avg Target is now set to 38,600
-        fig.add_hline(y=38600, line_dash="dash", line_color="red", annotation_text="Daily Avg Target")
+    production_chart()
+else:
+    st.info(f"Chart will appear here once {CURRENT_YEAR} data is recorded.")
+
+# --- ISSUE ANALYSIS ---
+perf.lap("issue analysis")
+
+@st.cache_resource
+def get_issue_index():
+    # Long-form issue table shared by all sessions; only changed years are re-melted
+    return IssueIndex()
+
+issue_index = get_issue_index()
+
+@st.cache_resource
+def get_metrics_api():
+    # JSON metrics for dashboards and pollers, served from this process's snapshot (DPP_API_PORT)
+    if not API_PORT:
+        return None
+    # Started once per process, so it follows targets.json itself rather than this rerun's targets
+    return start_metrics_api(MetricsApi(data_cache, issue_index, frozen_years=FROZEN_YEARS))
+
+get_metrics_api()
+
+@timed_fragment
+def issue_analysis(frag_perf):
+    a_col1, a_col2 = st.columns(2)
+    year = a_col1.selectbox("Year", ["All"] + sorted(aggregates.years, reverse=True), key="issue_year")
+    period = a_col2.radio("Correlate by", ["Week", "Month"], horizontal=True, key="issue_period")
+    start, end = (None, None) if year == "All" else (f"{year}-01-01", f"{year}-12-31")
+    with frag_perf.span("issue_analytics"):
+        analytics = get_issue_analytics(snapshot, issue_index, FROZEN_YEARS, start, end, period[0])
+    pareto = analytics['pareto']
+    if pareto.empty:
+        st.info("No issues recorded for this period.")
+        return
+    st.markdown("**Issue frequency (Pareto)**")
+    if PLOTLY_AVAILABLE:
+        top = pareto.head(20).reset_index()
+        fig = px.bar(top, x='Issue', y='Count', labels={'Count': 'Days logged'})
+        fig.add_scatter(x=top['Issue'], y=top['CumulativeShare'] * 100, yaxis='y2', name='Cumulative %')
+        fig.update_layout(yaxis2=dict(overlaying='y', side='right', range=[0, 100], title='Cumulative %'),
+                          showlegend=False)
         st.plotly_chart(fig, use_container_width=True)
     else:
-        st.info("No 2026 data available yet to display chart.")
-else:
-    st.info("Chart will appear here once 2026 data is recorded.")
+        st.dataframe(pareto, use_container_width=True)
+    c_col1, c_col2 = st.columns(2)
+    c_col1.markdown("**Issues logged together**")
+    c_col1.dataframe(analytics['cooccurrence'].head(15), use_container_width=True, hide_index=True)
+    c_col2.markdown(f"**Issue count vs production ({period.lower()}ly)**")
+    c_col2.dataframe(analytics['correlation'], use_container_width=True)
+
+st.write("---")
+if st.toggle("📊 Issue Analysis", key="show_issue_analysis"):
+    issue_analysis()
 
 # --- 8. TIMER UI ---
+perf.lap("8. timer")
 st.write("---")
-st.subheader("⏱️ Issue Downtime Tracker")
-t_col1, t_col2, t_col3 = st.columns([1, 1, 2])
-if not st.session_state.is_timer_running:
-    if t_col1.button("▶️ Start Timer"):
-        st.session_state.timer_start_time = datetime.now()
-        st.session_state.is_timer_running = True
-        st.rerun()
-else:
-    if t_col1.button("⏹️ Stop Timer"):
-        st.session_state.accumulated_downtime += (datetime.now() - st.session_state.timer_start_time)
-        st.session_state.is_timer_running = False
-        st.rerun()
 
-current_session = (datetime.now() - st.session_state.timer_start_time) if st.session_state.is_timer_running else timedelta(0)
-total_downtime_val = st.session_state.accumulated_downtime + current_session
-formatted_downtime = str(total_downtime_val).split('.')[0]
-t_col3.metric("Current Session", formatted_downtime)
+def start_downtime():
+    st.session_state.downtime_events.append(
+        {'issue': st.session_state.downtime_issue, 'start': datetime.now(), 'end': None})
+
+def stop_downtime(i):
+    st.session_state.downtime_events[i]['end'] = datetime.now()
+
+# Runs as a fragment: start/stop only re-executes this block, not the data path
+@timed_fragment
+def downtime_tracker(frag_perf):
+    st.subheader("⏱️ Issue Downtime Tracker")
+    events = st.session_state.downtime_events
+    running = [i for i, e in enumerate(events) if e['end'] is None]
+    t_col1, t_col2, t_col3 = st.columns([1, 1, 2])
+    t_col1.selectbox("Downtime Issue", [c for c in ISSUE_CATEGORIES if c != 'NoIssue'], key="downtime_issue")
+    already_running = any(events[i]['issue'] == st.session_state.downtime_issue for i in running)
+    t_col1.button("▶️ Start Timer", on_click=start_downtime, disabled=already_running)
+    for i in running:
+        t_col2.button(f"⏹️ Stop: {events[i]['issue']}", key=f"stop_downtime_{i}", on_click=stop_downtime, args=(i,))
+
+    now = datetime.now()
+    closed = total_downtime([e for e in events if e['end'] is not None], now)
+    with t_col3:
+        st.components.v1.html(ticker_html(closed, [event_duration(events[i], now) for i in running]), height=80)
+    if events:
+        st.dataframe(pd.DataFrame([{
+            'Issue': e['issue'],
+            'Started': e['start'].strftime('%H:%M:%S'),
+            'Stopped': e['end'].strftime('%H:%M:%S') if e['end'] else '⏱️ running',
+            'Duration': format_timedelta(event_duration(e, now)),
+        } for e in events]), use_container_width=True, hide_index=True)
+
+downtime_tracker()
+formatted_downtime = format_timedelta(total_downtime(st.session_state.downtime_events))
 
 # --- 9. ENTRY FORM ---
+perf.lap("9. entry form")
 st.write("---")
 v = st.session_state.form_version
 prod_date = st.date_input("Production Date", value=datetime.now().date(), key=f"date_{v}")
 
 # CHECK FOR DUPLICATES
-is_duplicate = False
-if not df_main.empty:
-    is_duplicate = (df_main['ProductionDate_Parsed'].dt.date == prod_date).any()
+# Entries still waiting in the journal count as already entered
+is_duplicate = prod_date in date_index or prod_date in parse_keys(journal.pending_keys())
+
+is_locked = prod_date.year in LOCKED_YEARS
 
 if is_duplicate:
     st.error(f"⚠️ An entry for {prod_date} already exists. Use the 'Edit/Delete' section below to modify it.")
-
-prev_ytd_prod, prev_ytd_jobs, prev_ytd_trials = calculate_ytd_metrics(prod_date, df_main)
+elif is_locked:
+    st.error(f"🔒 {prod_date.year} is archived and cannot take new entries.")
 
 with st.form("main_form", clear_on_submit=True):
     st.subheader("📝 New Daily Entry Details")
@@ -217,12 +321,14 @@ with st.form("main_form", clear_on_submit=True):
     selected_issues = c2.multiselect("Production Issues:", options=ISSUE_CATEGORIES, default=["NoIssue"])
     
     # Disable button if duplicate exists
-    submitted = st.form_submit_button("Submit Data", disabled=is_duplicate)
+    submitted = st.form_submit_button("Submit Data", disabled=is_duplicate or is_locked)
 
-if submitted and not is_duplicate:
+if submitted and not (is_duplicate or is_locked):
     try:
         entry = {col: 0 if "Total" in col or "NoOf" in col else "" for col in ALL_COLUMNS}
-        issues_to_save = selected_issues if selected_issues else ["NoIssue"]
+        # Issues timed in the downtime tracker are recorded with the entry
+        event_issues = [e['issue'] for e in st.session_state.downtime_events]
+        issues_to_save = [i for i in dict.fromkeys(selected_issues + event_issues) if i != "NoIssue"][:10] or ["NoIssue"]
         issue_dict = {f'ProductionIssues_{i+1}': issues_to_save[i] if i < len(issues_to_save) else "NoIssue" for i in range(10)}
 
         entry.update({
@@ -230,8 +336,6 @@ if submitted and not is_duplicate:
             'NoOfJobs': jobs_today, 
             'NoOfTrials': trials_today,
             'DailyProductionTotal': prod_today,
-            'YearlyProductionTotal': prev_ytd_prod + prod_today, 
-            'YTD_Jobs_Total': prev_ytd_jobs + jobs_today,
             'CleanMachineAm': f"{am_mins} mins",
             'CleanMachinePm': f"{pm_mins} mins",
             'CleanMachineTotal': f"{am_mins + pm_mins} mins",
@@ -242,178 +346,243 @@ if submitted and not is_duplicate:
         entry.update(issue_dict)
 
         new_row_df = pd.DataFrame([entry])[ALL_COLUMNS]
-        save_df = pd.concat([df_main.drop(columns=['ProductionDate_Parsed'], errors='ignore'), new_row_df], ignore_index=True).fillna("")
-        
-        conn.update(spreadsheet=SPREADSHEET_URL, worksheet=SHEET_NAME, data=save_df)
-        st.success("✅ Data saved successfully!")
+        sheet_header = [c for c in df_main.columns if c not in DERIVED_COLUMNS] or ALL_COLUMNS
+        # Durable local commit first; the sync worker writes it with its running
+        # totals (and the later rows a backdated entry shifts) in one retried apply
+        journal.enqueue(new_row_df, sheet_header)
+        sync_worker.wake()
+        st.success("✅ Data saved! It will be synced to storage within a few seconds.")
         st.session_state.form_version += 1
-        st.session_state.accumulated_downtime = timedelta(0) 
+        st.session_state.downtime_events = []
         st.rerun()
     except Exception as e:
         st.error(f"❌ Save Error: {e}")
 
+sync_counts = journal.status_counts()
+if sync_counts['pending'] or sync_counts['conflict'] or sync_worker.last_error:
+    status = f"☁️ Sync status: {sync_counts['pending']} pending, {sync_counts['synced']} synced"
+    if sync_counts['conflict']:
+        status += f", {sync_counts['conflict']} need attention"
+    if sync_worker.last_error:
+        status += f" (last attempt failed: {sync_worker.last_error})"
+    st.caption(status)
+    with st.expander("📮 Sync queue", expanded=bool(sync_counts['conflict'])):
+        conflicts = journal.recent(limit=100, status=CONFLICT)
+        if len(conflicts):
+            # These will never sync as they are: fix the stored row and retry, or drop the entry
+            st.warning("⚠️ These entries clash with stored data. Retry after fixing the stored row, or discard them.")
+            st.dataframe(conflicts, use_container_width=True, hide_index=True)
+            labels = dict(zip(conflicts['id'], conflicts['row_key']))
+            picked = st.multiselect("Entries", list(labels), format_func=lambda i: f"#{i} ({labels[i]})", key="conflict_pick")
+            q1, q2 = st.columns(2)
+            if q1.button("🔁 Retry sync", disabled=not picked):
+                try:
+                    journal.requeue(picked)
+                    sync_worker.wake()
+                    st.rerun()
+                except DuplicateRowError as e:
+                    st.error(f"❌ {e}")
+            if q2.button("🗑️ Discard", disabled=not picked):
+                journal.discard(picked)
+                st.rerun()
+        st.dataframe(journal.recent(), use_container_width=True, hide_index=True)
+else:
+    st.caption(f"☁️ All {sync_counts['synced']} queued entries synced ({backend.name}).")
+
+# Several days (or another press's history) at once: validated as a batch, written in one call
+with st.expander("📥 Bulk import (CSV / Excel)"):
+    upload = st.file_uploader("Daily entries in the sheet's column layout", type=["csv", "xlsx"], key="bulk_upload")
+    if upload is not None:
+        try:
+            report = validate_import(read_table(upload, upload.name),
+                                     date_index.date_set | parse_keys(journal.pending_keys()), LOCKED_YEARS)
+            sheet_header = [c for c in df_main.columns if c not in DERIVED_COLUMNS] or ALL_COLUMNS
+            partition = to_sheet_frame(df_main[scope_mask(df_main['ProductionDate_Parsed'], report.valid[KEY_COLUMN])])
+            # Dry run against the snapshot: fills report.ripple for the summary
+            plan_import(report, partition, sheet_header)
+            st.caption(f"Dry run: {report.summary()}")
+            if report.unknown_columns:
+                st.warning("Ignored columns: " + ", ".join(report.unknown_columns))
+            if len(report.errors):
+                st.dataframe(report.errors, use_container_width=True, hide_index=True)
+            else:
+                st.dataframe(report.rows.head(20), use_container_width=True, hide_index=True)
+            if st.button(f"📥 Import {len(report.valid)} rows", disabled=bool(len(report.errors)) or report.valid.empty):
+                # The preview above used the cached snapshot; the write re-reads the stored
+                # range, so dates saved since then are refused and totals are current
+                written = push_with_rollups(backend, report.valid, sheet_header)
+                data_cache.invalidate()
+                st.success(f"✅ Imported ({written.summary()})" if written else "✅ Nothing new to import")
+                st.rerun()
+        except Exception as e:
+            st.error(f"❌ Import Error: {e}")
+
 # --- 10. EDIT & DELETE MANAGEMENT ---
+perf.lap("10. record management")
 st.write("---")
 st.subheader("🛠️ Record Management")
 
 # A. READ-ONLY HISTORICAL ARCHIVE
-with st.expander("📂 View Historical Records (2024-2025) - Read Only"):
-    st.warning("🔒 Records from 2024 and 2025 are archived and cannot be modified.")
-    if not df_main.empty:
-        hist_df = df_main[df_main['ProductionDate_Parsed'].dt.year.isin([2024, 2025])].copy()
-        st.dataframe(hist_df.drop(columns=['ProductionDate_Parsed'], errors='ignore'), use_container_width=True)
+# Loaded only when switched on, and paged on the server inside a fragment
+@timed_fragment
+def historical_archive(frag_perf):
+    st.warning(f"🔒 Records from {', '.join(map(str, LOCKED_YEARS))} are archived and cannot be modified.")
+    archive = get_sorted_archive(snapshot, LOCKED_YEARS)
+    if archive.empty:
+        st.info("No archived records.")
+        return
+    first_day = archive['ProductionDate_Parsed'].iloc[0].date()
+    last_day = archive['ProductionDate_Parsed'].iloc[-1].date()
+    f_col1, f_col2, f_col3, f_col4 = st.columns([2, 2, 1, 1])
+    date_range = f_col1.date_input("Date range", value=(first_day, last_day),
+                                   min_value=first_day, max_value=last_day, key="archive_range")
+    issues = f_col2.multiselect("Issue", ISSUE_CATEGORIES, key="archive_issues")
+    page_size = f_col3.selectbox("Rows per page", [25, 50, 100], key="archive_page_size")
+    start, end = (date_range + (None,))[:2] if isinstance(date_range, tuple) else (date_range, None)
+    rows = filter_rows(archive, start, end, issues)
+    page_count = max(1, math.ceil(len(rows) / page_size))
+    # Default and clamp live in session_state only; passing value= as well makes Streamlit warn
+    st.session_state.archive_page = min(st.session_state.get("archive_page", 1), page_count)
+    page = f_col4.number_input("Page", min_value=1, max_value=page_count, key="archive_page")
+    page_rows, _ = page_of(rows, page, page_size)
+    st.caption(f"{len(rows):,} records · page {page} of {page_count}")
+    st.dataframe(page_rows.drop(columns=DERIVED_COLUMNS, errors='ignore'), use_container_width=True, hide_index=True)
+
+if LOCKED_YEARS and st.toggle(f"📂 View Historical Records ({LOCKED_YEARS[0]}-{LOCKED_YEARS[-1]}) - Read Only", key="show_archive"):
+    historical_archive()
 
 # B. EDITABLE RECENT RECORDS
-with st.expander("📝 Edit 2026 Records"):
-    st.info("💡 Only 2026 entries are displayed here for editing.")
+with st.expander(f"📝 Edit {CURRENT_YEAR} Records"):
+    st.info(f"💡 Only {CURRENT_YEAR} entries are displayed here for editing.")
     if not df_main.empty:
         # Separate the data
-        hist_mask = df_main['ProductionDate_Parsed'].dt.year.isin([2024, 2025])
-        locked_part = df_main[hist_mask].drop(columns=['ProductionDate_Parsed'], errors='ignore')
-        editable_part = df_main[~hist_mask].drop(columns=['ProductionDate_Parsed'], errors='ignore')
+        hist_mask = df_main['ProductionDate_Parsed'].dt.year.isin(LOCKED_YEARS)
+        editable_part = df_main[~hist_mask].drop(columns=DERIVED_COLUMNS, errors='ignore')
         
-        # Data Editor for 2026 only
-        edited_recent = st.data_editor(
-            editable_part, 
-            num_rows="dynamic", 
-            use_container_width=True,
-            key="editor_2026"
-        )
+        # Data Editor for the live year only
+        with perf.span("data_editor"):
+            edited_recent = st.data_editor(
+                editable_part, 
+                num_rows="dynamic", 
+                use_container_width=True,
+                key="editor_live"
+            )
         
-        if st.button("💾 Save 2026 Changes"):
+        if st.button(f"💾 Save {CURRENT_YEAR} Changes"):
             try:
-                # Re-combine locked history with edited 2026 data
-                final_df = pd.concat([locked_part, edited_recent], ignore_index=True).fillna("")
-                conn.update(spreadsheet=SPREADSHEET_URL, worksheet=SHEET_NAME, data=final_df)
-                st.success("✅ 2026 records updated successfully!")
-                st.rerun()
+                # Only the rows that actually changed are written, keyed by ProductionDate
+                sheet_header = list(editable_part.columns)
+                before, after = to_sheet_frame(editable_part), to_sheet_frame(edited_recent)
+                changes = diff_rows(before, after, sheet_header, locked_years=LOCKED_YEARS)
+                if changes:
+                    # Refresh running totals from the earliest edited day onwards
+                    touched = list(changes.inserts.index) + list(changes.updates.index) + changes.deletes
+                    # Archived days of a week that straddles New Year still count towards it
+                    context = to_sheet_frame(df_main[hist_mask & scope_mask(df_main['ProductionDate_Parsed'], touched)])
+                    after = with_rollups(pd.concat([context, after], ignore_index=True), touched).iloc[len(context):]
+                    changes = diff_rows(before, after, sheet_header, locked_years=LOCKED_YEARS)
+                if not changes:
+                    st.info("No changes to save.")
+                else:
+                    backend.apply(changes, sheet_header)
+                    data_cache.invalidate()
+                    st.success(f"✅ {CURRENT_YEAR} records updated successfully! ({changes.summary()})")
+                    st.rerun()
+            except LockedRowError as e:
+                st.error(f"🔒 {e}")
+            except ConflictError as e:
+                # Nothing was written; the next rerun loads the other operator's version
+                data_cache.invalidate()
+                st.error(f"⚠️ {e}")
+                st.dataframe(e.conflicts, use_container_width=True, hide_index=True)
             except Exception as e:
                 st.error(f"❌ Update Error: {e}")
     else:
         st.info("No records available to edit.")
 
 # --- 11. RECENT VIEW ---
+perf.lap("11. recent view")
 st.write("---")
 st.subheader("📋 Recent Records (Read Only)")
 if not df_main.empty:
-    st.dataframe(df_main.sort_values('ProductionDate_Parsed', ascending=False).head(10), use_container_width=True)
+    st.dataframe(recent_rows(df_main, 10).drop(columns=DERIVED_COLUMNS, errors='ignore'), use_container_width=True)
 
 
 # --- 12. EXPORT & SHARE ---
+perf.lap("12. export & share")
 st.write("---")
 st.subheader("📤 Export & Share Report")
 
-# Preparation for WhatsApp message
-friendly_date = datetime.now().strftime('%d %B %Y')
-whatsapp_phone = st.text_input("Colleague's WhatsApp Number (e.g. 27123456789)", placeholder="27123456789")
-clean_phone = ''.join(filter(str.isdigit, whatsapp_phone))
-
-share_message = f"Digital Printing Report: {friendly_date}\n\nTotal Production: {ytd_2026:,.0f} meters."
-encoded_msg = urllib.parse.quote(share_message)
-wa_link = f"https://wa.me/{clean_phone}?text={encoded_msg}"
-
-col_share1, col_share2 = st.columns(2)
-
-with col_share1:
-    st.write("Step 1: Save Report")
-    
-    # 1. NEW COMPONENT: NATIVE SHARE/IMAGE TRIGGER
-    # This script uses the Web Share API to prompt the mobile device to "share" the current view.
-    # On mobile, this allows the user to take a snapshot/PDF of the specific area and send to WhatsApp.
-    share_js = """
-    <script>
-    async function shareReport() {
-      if (navigator.share) {
-        try {
-          await navigator.share({
-            title: 'Digital Printing Production Report',
-            text: 'Daily Production Summary: """ + friendly_date + """',
-            url: window.location.href
-          });
-        } catch (err) {
-          console.log("Share failed", err);
-        }
-      } else {
-        alert("Native share not supported on this browser. Please use the 'Create PDF' button.");
-      }
-    }
-    </script>
-    <button onclick="shareReport()" style="
-        background-color: #6c5ce7;
-        color: white;
-        padding: 12px;
-        width: 100%;
-        border: none;
-        border-radius: 8px;
-        font-weight: bold;
-        cursor: pointer;
-        margin-bottom: 10px;">
-        📸 Share Report Snapshot (Mobile)
-    </button>
-    """
-    st.components.v1.html(share_js, height=60)
-
-    # 2. ORIGINAL JAVASCRIPT PRINT BUTTON
-    print_js = """
-    <script>
-    function printReport() {
-        setTimeout(function() {
-            window.print();
-        }, 1000);
-    }
-    </script>
-    <button onclick="printReport()" style="
-        background-color: #0083B8;
-        color: white;
-        padding: 12px;
-        width: 100%;
-        border: none;
-        border-radius: 8px;
-        font-weight: bold;
-        cursor: pointer;
-        margin-bottom: 10px;">
-        📄 Create PDF (System Dialog)
-    </button>
-    """
-    st.components.v1.html(print_js, height=70)
-
-    # 3. DIRECT PDF DOWNLOAD (Via Google Sheets Export)
-    sheet_id = SPREADSHEET_URL.split("/d/")[1].split("/")[0]
-    pdf_export_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=pdf"
-    
-    st.markdown(f'''
-        <a href="{pdf_export_url}" target="_blank" style="text-decoration: none;">
-            <div style="
-                background-color: #E74C3C;
-                color: white;
-                padding: 12px;
-                text-align: center;
-                border-radius: 8px;
-                font-size: 14px;
-                font-weight: bold;
-                margin-bottom: 20px;">
-                📥 Download Data as PDF (Full List)
-            </div>
-        </a>
-        ''', unsafe_allow_html=True)
-
-with col_share2:
-    st.write("Step 2: Send WhatsApp")
-    if clean_phone:
-        st.markdown(f'''
-            <a href="{wa_link}" target="_blank" style="text-decoration: none;">
-                <div style="
-                    background-color: #25D366;
-                    color: white;
-                    padding: 12px;
-                    text-align: center;
-                    border-radius: 8px;
-                    font-size: 16px;
-                    font-weight: bold;
-                    box-shadow: 2px 2px 5px rgba(0,0,0,0.1);">
-                    📲 Send WhatsApp Message
-                </div>
-            </a>
-            ''', unsafe_allow_html=True)
-    else:
-        st.warning("Enter phone number.")
\ No newline at end of file
+# Reports are rendered on the server from the cached snapshot; the same summary feeds WhatsApp
+@timed_fragment
+def export_and_share(frag_perf):
+    r_col1, r_col2 = st.columns(2)
+    period = r_col1.radio("Report period", ["Day", "Week", "Month"], horizontal=True, key="report_period")
+    anchor = r_col2.date_input("Report date", value=datetime.now().date(), key="report_date")
+    summary = get_report_summary(snapshot, period.lower(), anchor, targets)
+    whatsapp_phone = st.text_input("Colleague's WhatsApp Number (e.g. 27123456789)", placeholder="27123456789")
+    clean_phone = ''.join(filter(str.isdigit, whatsapp_phone))
+
+    share_message = summary.text()
+    encoded_msg = urllib.parse.quote(share_message)
+    wa_link = f"https://wa.me/{clean_phone}?text={encoded_msg}"
+
+    col_share1, col_share2 = st.columns(2)
+
+    with col_share1:
+        st.write("Step 1: Save Report")
+        st.code(share_message, language=None)
+        file_stem = f"{summary.period}_report_{summary.start:%Y-%m-%d}"
+        st.download_button("📄 Download Report (HTML)", data=render_html(summary), file_name=f"{file_stem}.html",
+                           mime="text/html", use_container_width=True)
+        # PDF/PNG only when matplotlib is installed; rendered once per data version
+        for fmt, mime in [("pdf", "application/pdf"), ("png", "image/png")] if IMAGE_REPORTS_AVAILABLE else []:
+            data = snapshot.memo(('report_file', fmt, summary.period, summary.start, targets.key(summary.end.year)),
+                                 lambda: render(summary, fmt))
+            st.download_button(f"📥 Download Report ({fmt.upper()})", data=data, file_name=f"{file_stem}.{fmt}",
+                               mime=mime, use_container_width=True)
+
+    with col_share2:
+        st.write("Step 2: Send WhatsApp")
+        if clean_phone:
+            st.markdown(f'''
+                <a href="{wa_link}" target="_blank" style="text-decoration: none;">
+                    <div style="
+                        background-color: #25D366;
+                        color: white;
+                        padding: 12px;
+                        text-align: center;
+                        border-radius: 8px;
+                        font-size: 16px;
+                        font-weight: bold;
+                        box-shadow: 2px 2px 5px rgba(0,0,0,0.1);">
+                        📲 Send WhatsApp Message
+                    </div>
+                </a>
+                ''', unsafe_allow_html=True)
+        else:
+            st.warning("Enter phone number.")
+
+if df_main.empty:
+    st.info("Reports will be available once production data is recorded.")
+else:
+    export_and_share()
+
+perf.finish()
+
+# --- 13. ADMIN: PERFORMANCE PANEL (?perf=1) ---
+if show_perf_panel:
+    st.write("---")
+    with st.expander("🩺 Performance (admin)", expanded=True):
+        summary = perf_recorder.summary()
+        st.caption(f"{perf_recorder.runs} timed reruns · data version {snapshot.version} · {backend.name} backend")
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        if not summary.empty:
+            span_name = st.selectbox("Histogram (ms)", summary['span'].tolist())
+            st.bar_chart(perf_recorder.histogram(span_name))
+        memory = df_main.attrs.get('memory_report')
+        if memory:
+            st.caption(f"In-memory table: {memory['rows']:,} rows, "
+                       f"{memory['bytes_before'] / 2**20:.1f} MiB raw -> {memory['bytes_after'] / 2**20:.1f} MiB typed")
+        if st.button("Reset timings"):
+            perf_recorder.reset()
@@ -0,0 +1,64 @@
+import pandas as pd
+
+# --- PRECOMPUTED PRODUCTION AGGREGATES ---
+# Numeric columns are coerced once and grouped once per (year, month, week);
+# the yearly, monthly and weekly views are rolled up from that small result.
+
+MEASURES = {
+    'Production': 'DailyProductionTotal',
+    'Jobs': 'NoOfJobs',
+    'Trials': 'NoOfTrials',
+    'DowntimeSec': 'IssueResolutionTotal_Sec',
+    'CleaningSec': 'CleanMachineTotal_Sec',
+}
+
+
+class Aggregates:
+    def __init__(self, yearly, monthly, weekly):
+        self.yearly = yearly
+        self.monthly = monthly
+        self.weekly = weekly
+
+    @property
+    def years(self):
+        return list(self.yearly.index)
+
+    def total(self, year, measure='Production'):
+        if year in self.yearly.index:
+            return self.yearly.at[year, measure]
+        return 0
+
+
+def _empty_frame(index):
+    return pd.DataFrame({name: pd.Series(dtype='float64') for name in MEASURES}, index=index)
+
+
+def compute_aggregates(df):
+    if df.empty or 'ProductionDate_Parsed' not in df.columns:
+        return Aggregates(
+            _empty_frame(pd.Index([], name='Year')),
+            _empty_frame(pd.MultiIndex.from_arrays([[], []], names=['Year', 'Month'])),
+            _empty_frame(pd.DatetimeIndex([], name='Week')),
+        )
+    valid = df['ProductionDate_Parsed'].notna()
+    dates = df.loc[valid, 'ProductionDate_Parsed']
+    values = pd.DataFrame({
+        name: pd.to_numeric(df.loc[valid, col], errors='coerce').fillna(0)
+        if col in df.columns else pd.Series(0, index=dates.index)
+        for name, col in MEASURES.items()
+    })
+    keys = [
+        dates.dt.year.rename('Year'),
+        dates.dt.month.rename('Month'),
+        dates.dt.to_period('W').dt.start_time.rename('Week'),
+    ]
+    buckets = values.groupby(keys).sum()
+    return Aggregates(
+        yearly=buckets.groupby(level='Year').sum(),
+        monthly=buckets.groupby(level=['Year', 'Month']).sum(),
+        weekly=buckets.groupby(level='Week').sum(),
+    )
+
+
+def get_aggregates(snapshot):
+    return snapshot.memo('aggregates', lambda: compute_aggregates(snapshot.df))
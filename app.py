@@ -5,6 +5,9 @@ import matplotlib.pyplot as plt
 from streamlit_gsheets import GSheetsConnection
 from datetime import timedelta, datetime
 import ssl
+from config import DATA_REFRESH_SECONDS
+from data_cache import DataCache
+from durations import DURATION_COLUMNS, seconds_column, add_duration_seconds
 
 # --- 0. SSL BYPASS ---
 try:
@@ -49,18 +52,35 @@ if 'is_timer_running' not in st.session_state:
 conn = st.connection("gsheets", type=GSheetsConnection)
 
 # --- 3. DATA HELPERS ---
+def prepare_gsheets_data(data):
+    if data.empty:
+        return pd.DataFrame(columns=ALL_COLUMNS)
+    data['ProductionDate'] = pd.to_datetime(data['ProductionDate']).dt.normalize()
+    numeric_cols = ['NoOfJobs', 'DailyProductionTotal', 'YearlyProductionTotal', 'YTD_Jobs_Total']
+    for col in numeric_cols:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
+    # "0:45:00" style durations -> integer seconds (<col>_Sec), parsed once per load
+    data.attrs['malformed_durations'] = add_duration_seconds(data)
+    return data
+
+@st.cache_resource
+def get_data_cache():
+    # Shared across sessions; reloaded in the background and after our own writes
+    cache = DataCache(
+        # We pass the spreadsheet URL here to fix the "Spreadsheet must be specified" error
+        loader=lambda: conn.read(spreadsheet=SPREADSHEET_URL, worksheet=SHEET_NAME, ttl=0),
+        prepare=prepare_gsheets_data,
+        refresh_seconds=DATA_REFRESH_SECONDS,
+    )
+    cache.start()
+    return cache
+
+data_cache = get_data_cache()
+
 def load_gsheets_data():
     try:
-        # We pass the spreadsheet URL here to fix the "Spreadsheet must be specified" error
-        data = conn.read(spreadsheet=SPREADSHEET_URL, worksheet=SHEET_NAME, ttl=0)
-        if data is not None and not data.empty:
-            data['ProductionDate'] = pd.to_datetime(data['ProductionDate']).dt.normalize()
-            numeric_cols = ['NoOfJobs', 'DailyProductionTotal', 'YearlyProductionTotal', 'YTD_Jobs_Total']
-            for col in numeric_cols:
-                if col in data.columns:
-                    data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
-            return data
-        return pd.DataFrame(columns=ALL_COLUMNS)
+        return data_cache.snapshot().df
     except Exception as e:
         st.error(f"🚨 Connection Failed: {e}")
         st.info("Tip: Ensure your Service Account email is added as an 'Editor' on the Google Sheet.")
@@ -141,9 +161,11 @@ if submitted and not date_exists:
         entry[f'ProductionIssues_{i}'] = selected_issues[i-1] if i <= len(selected_issues) else "NoIssue"
 
     try:
-        updated_df = pd.concat([df_main, pd.DataFrame([entry])], ignore_index=True)
+        seconds_cols = [seconds_column(c) for c in DURATION_COLUMNS]
+        updated_df = pd.concat([df_main.drop(columns=seconds_cols, errors='ignore'), pd.DataFrame([entry])], ignore_index=True)
         # We must also provide the spreadsheet URL here for updating
         conn.update(spreadsheet=SPREADSHEET_URL, worksheet=SHEET_NAME, data=updated_df)
+        data_cache.invalidate()
         st.success("✅ Saved!")
         st.session_state.form_version += 1
         st.rerun()
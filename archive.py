@@ -0,0 +1,125 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+# --- IMMUTABLE YEAR PARTITIONS ---
+# Closed years are frozen into gzipped CSV snapshots (raw sheet values) with
+# a SHA-256 checksum in manifest.json. A frozen year is never rewritten; it
+# is verified and loaded once per process and then served from memory.
+
+
+class ArchiveCorrupt(Exception):
+    pass
+
+
+class ArchiveStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._manifest_path = os.path.join(directory, 'manifest.json')
+        self._loaded = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self._manifest_path) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {'partitions': {}, 'boundary': None}
+
+    def frozen_years(self):
+        return sorted(int(y) for y in self.manifest['partitions'])
+
+    @property
+    def boundary(self):
+        # Where the live rows start in the source: {'offset', 'key', 'since'}
+        return self.manifest.get('boundary')
+
+    def _write_manifest(self):
+        tmp = self._manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._manifest_path)
+
+    def _path(self, year):
+        return os.path.join(self.directory, f'production_{year}.csv.gz')
+
+    def freeze(self, year, rows):
+        year = str(year)
+        if year in self.manifest['partitions']:
+            raise ValueError(f"{year} is already frozen")
+        buffer = io.StringIO()
+        rows.to_csv(buffer, index=False)
+        payload = gzip.compress(buffer.getvalue().encode('utf-8'), mtime=0)
+        tmp = self._path(year) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, self._path(year))
+        self.manifest['partitions'][year] = {
+            'file': os.path.basename(self._path(year)),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+            'rows': len(rows),
+            'frozen_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self._write_manifest()
+
+    def set_boundary(self, offset, key, since):
+        self.manifest['boundary'] = {'offset': int(offset), 'key': key, 'since': since}
+        self._write_manifest()
+
+    def load(self, year):
+        year = str(year)
+        with self._lock:
+            if year in self._loaded:
+                return self._loaded[year]
+        entry = self.manifest['partitions'][year]
+        with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+            payload = f.read()
+        if hashlib.sha256(payload).hexdigest() != entry['sha256']:
+            raise ArchiveCorrupt(f"Checksum mismatch for frozen year {year}")
+        rows = pd.read_csv(io.BytesIO(gzip.decompress(payload)), dtype=str, keep_default_na=False)
+        with self._lock:
+            return self._loaded.setdefault(year, rows)
+
+    def load_all(self):
+        frames = [self.load(y) for y in self.frozen_years()]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def verify(self):
+        problems = {}
+        for year in self.frozen_years():
+            try:
+                self.load(year)
+            except (ArchiveCorrupt, OSError) as e:
+                problems[year] = str(e)
+        return problems
+
+
+if __name__ == '__main__':
+    from config import ARCHIVE_DIR
+    from storage import open_backend
+
+    parser = argparse.ArgumentParser(description="Inspect or update the frozen year archive.")
+    parser.add_argument('command', choices=['status', 'verify', 'freeze'])
+    args = parser.parse_args()
+    store = ArchiveStore(ARCHIVE_DIR)
+    if args.command == 'freeze':
+        backend = open_backend(archive=True)
+        frozen = backend.freeze_closed_years()
+        print(f"Frozen: {frozen or 'nothing new'}")
+        # Report the manifest the freeze just wrote, not the one loaded above
+        store = backend.archive
+    elif args.command == 'verify':
+        problems = store.verify()
+        for year, problem in problems.items():
+            print(f"{year}: {problem}")
+        raise SystemExit(1 if problems else 0)
+    for year in store.frozen_years():
+        entry = store.manifest['partitions'][str(year)]
+        print(f"{year}: {entry['rows']:>6} rows  sha256 {entry['sha256'][:12]}  frozen {entry['frozen_at']}")
+    print(f"Live boundary: {store.boundary}")
@@ -0,0 +1,120 @@
+import argparse
+import functools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from aggregates import compute_aggregates
+from benchmarks.synthetic import generate_production_table, MAX_DAYS_PER_PRESS
+from charts import chart_series
+from date_index import build_date_index
+from journal import SyncWorker, WriteJournal
+from metrics import calculate_ytd_downtime
+from rollups import push_with_rollups, with_rollups
+from schema import ALL_COLUMNS, normalize_frame, to_sheet_frame
+from sheets_io import diff_rows
+from storage import SQLiteBackend
+
+# --- PER-RERUN PIPELINE BENCHMARKS ---
+# python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 1000000
+# Each stage is timed (best of --repeat) and then run once more under
+# tracemalloc for its peak allocation.
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def measure(fn, setup=None, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    args = setup() if setup else ()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def prepare(raw):
+    normalize_frame(raw)
+    return raw
+
+
+def build_stages(raw, workdir):
+    df = prepare(raw.copy())
+    year = int(df['ProductionDate_Parsed'].dt.year.min())
+    rng = np.random.default_rng(1)
+    lookups = pd.to_datetime(rng.choice(df['ProductionDate_Parsed'].dropna().to_numpy(), 100))
+
+    def duplicate_check():
+        index = build_date_index(df)
+        for day in lookups:
+            day in index
+
+    # The save path runs against one press (unique dates) in a local store:
+    # a submit is journaled, then the sync worker stores it with its running totals
+    store_rows = with_rollups(to_sheet_frame(df.iloc[:MAX_DAYS_PER_PRESS]))
+    store = SQLiteBackend(os.path.join(workdir, 'bench.sqlite3'))
+    store.append(store_rows)
+    worker = SyncWorker(WriteJournal(os.path.join(workdir, 'journal.sqlite3')),
+                        functools.partial(push_with_rollups, store))
+    last_day = pd.to_datetime(store_rows['ProductionDate']).max()
+    counter = iter(range(1, 10**9))
+
+    def save_path():
+        new_row = store_rows.iloc[[-1]].copy()
+        new_row['ProductionDate'] = (last_day + pd.Timedelta(days=next(counter))).strftime('%m/%d/%Y')
+        worker.journal.enqueue(new_row, ALL_COLUMNS)
+        worker.sync_once()
+
+    edited = [store_rows.iloc[[0]]]
+
+    def edit_path():
+        # Each edit starts from the row as last saved, so its version token matches
+        before = edited[-1]
+        after = before.copy()
+        after['NoOfJobs'] = int(after['NoOfJobs'].iloc[0]) + 1
+        store.apply(diff_rows(before, after, ALL_COLUMNS), ALL_COLUMNS)
+        edited.append(after)
+
+    return {
+        'load_normalization': (prepare, lambda: (raw.copy(),)),
+        'duplicate_check': (duplicate_check, None),
+        'calculate_ytd_downtime': (lambda: calculate_ytd_downtime(df, year), None),
+        'header_aggregates': (lambda: compute_aggregates(df), None),
+        'chart_preparation': (lambda: chart_series(df, None), None),
+        'save_path': (save_path, None),
+        'edit_path': (edit_path, None),
+    }
+
+
+def run(sizes, repeat=3):
+    results = []
+    for size in sizes:
+        raw = generate_production_table(size)
+        with tempfile.TemporaryDirectory() as workdir:
+            for stage, (fn, setup) in build_stages(raw, workdir).items():
+                seconds, peak = measure(fn, setup, repeat)
+                results.append({'rows': size, 'stage': stage, 'seconds': seconds, 'peak_bytes': peak})
+                print(f"{size:>9,} rows  {stage:<24} {seconds * 1000:>10.2f} ms  {peak / 2**20:>9.2f} MiB", flush=True)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the per-rerun pipeline on synthetic production tables.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+    results = run(args.sizes, args.repeat)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
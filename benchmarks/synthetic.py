@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from schema import ALL_COLUMNS, ISSUE_CATEGORIES, DAY_COLUMNS, ISSUE_COLUMNS
+
+# --- SYNTHETIC PRODUCTION TABLES ---
+# Raw, sheet-shaped frames (strings and blanks, mixed duration formats) in the
+# ALL_COLUMNS layout. One press has at most MAX_DAYS_PER_PRESS consecutive
+# days; bigger tables are several presses over the same calendar, which is
+# how multi-press history will look once it is loaded.
+
+MAX_DAYS_PER_PRESS = 50_000
+
+# Share of rows written in each duration style, as seen in the live sheet
+_CLEAN_FORMATS = [('{m} mins', 0.55), ('{h}:{mm:02d}:00', 0.3), ('{m}:00', 0.05),
+                  ('{h} hr {mm} min', 0.05), ('', 0.04), ('n/a', 0.01)]
+
+
+def _format_minutes(minutes, formats, rng):
+    styles, weights = zip(*formats)
+    picks = rng.choice(len(styles), size=len(minutes), p=np.array(weights) / sum(weights))
+    return [styles[p].format(m=m, h=m // 60, mm=m % 60) for p, m in zip(picks, minutes)]
+
+
+def _issue_weights(n):
+    # Zipf-like: a handful of issues dominate, NoIssue most of all
+    weights = 1.0 / np.arange(1, n + 1) ** 1.1
+    return weights / weights.sum()
+
+
+def generate_production_table(n_rows, seed=0, start='2024-01-01'):
+    rng = np.random.default_rng(seed)
+    presses = max(1, math.ceil(n_rows / MAX_DAYS_PER_PRESS))
+    days_per_press = math.ceil(n_rows / presses)
+    calendar = pd.date_range(start, periods=days_per_press, freq='D')
+    dates = pd.DatetimeIndex(np.tile(calendar.values, presses)[:n_rows])
+    press = np.repeat(np.arange(presses), days_per_press)[:n_rows]
+
+    weekend = dates.dayofweek >= 5
+    production = np.clip(rng.normal(38600, 12000, n_rows), 0, None).round().astype(int)
+    production[weekend & (rng.random(n_rows) < 0.8)] = 0
+    jobs = rng.poisson(6, n_rows)
+    trials = rng.poisson(0.6, n_rows)
+
+    df = pd.DataFrame({c: '' for c in ALL_COLUMNS}, index=range(n_rows))
+    df['ProductionDate'] = dates.strftime('%m/%d/%Y')
+    df['TempDate'] = dates.strftime('%Y-%m-%d')
+    df['NoOfJobs'] = jobs.astype(str)
+    df['NoOfTrials'] = trials.astype(str)
+    df['DailyProductionTotal'] = production.astype(str)
+    df['WeeklyProductionTotal'] = '0'
+    df['MonthlyProductionTotal'] = '0'
+    keys = [press, dates.year]
+    df['YearlyProductionTotal'] = pd.Series(production).groupby(keys).cumsum().astype(str).to_numpy()
+    df['YTD_Jobs_Total'] = pd.Series(jobs).groupby(keys).cumsum().astype(str).to_numpy()
+
+    am = rng.choice([30, 45, 60, 90], size=n_rows, p=[0.2, 0.6, 0.15, 0.05])
+    pm = rng.choice([30, 45, 60, 90], size=n_rows, p=[0.2, 0.6, 0.15, 0.05])
+    df['CleanMachineAm'] = _format_minutes(am, _CLEAN_FORMATS, rng)
+    df['CleanMachinePm'] = _format_minutes(pm, _CLEAN_FORMATS, rng)
+    df['CleanMachineTotal'] = _format_minutes(am + pm, _CLEAN_FORMATS, rng)
+    downtime = rng.exponential(2400, n_rows).astype(int)
+    df['IssueResolutionTotal'] = [
+        f"{s // 3600}:{(s % 3600) // 60:02d}:{s % 60:02d}" if r > 0.05 else f"{s // 60}:{s % 60:02d}"
+        for s, r in zip(downtime, rng.random(n_rows))
+    ]
+
+    # Issue mix: 0-4 issues per day drawn from ISSUE_CATEGORIES, padded with NoIssue
+    real_issues = np.array(ISSUE_CATEGORIES[1:], dtype=object)
+    counts = rng.choice(5, size=n_rows, p=[0.45, 0.3, 0.15, 0.07, 0.03])
+    drawn = rng.choice(real_issues, size=(n_rows, 4), p=_issue_weights(len(real_issues)))
+    slots = np.arange(len(ISSUE_COLUMNS))
+    for i, col in enumerate(ISSUE_COLUMNS):
+        df[col] = np.where(slots[i] < counts, drawn[:, min(i, 3)], 'NoIssue')
+
+    weekday = dates.day_name()
+    for day in DAY_COLUMNS:
+        df[day] = np.where(weekday == day, '1', '')
+    return df
@@ -0,0 +1,135 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from durations import DURATION_COLUMNS, malformed_durations
+from rollups import rollup_insert, scope_mask
+from schema import ALL_COLUMNS, ISSUE_CATEGORIES, ISSUE_COLUMNS, DAY_COLUMNS
+from sheets_io import KEY_COLUMN, RowDiff, key_rows
+
+# --- BULK IMPORT ---
+# Many days at once from CSV or Excel: every check runs column-wise over the
+# whole batch, running totals are filled for the batch, and the rows (plus any
+# later rows whose totals shift) go to storage as a single RowDiff.
+
+COUNT_COLUMNS = ['NoOfJobs', 'NoOfTrials', 'DailyProductionTotal']
+
+
+def read_table(path_or_buffer, name=None):
+    name = (name or str(path_or_buffer)).lower()
+    if name.endswith(('.xlsx', '.xls')):
+        try:
+            rows = pd.read_excel(path_or_buffer, dtype=str)
+        except ImportError:
+            raise ValueError("Excel import needs openpyxl; save the sheet as CSV instead")
+    else:
+        rows = pd.read_csv(path_or_buffer, dtype=str, keep_default_na=False)
+    rows.columns = [str(c).strip() for c in rows.columns]
+    return rows.fillna('')
+
+
+class ImportReport:
+    def __init__(self, rows, errors, unknown_columns):
+        self.rows = rows                # cleaned batch in ALL_COLUMNS layout
+        self.errors = errors            # Row (1-based, as in the file), Column, Value, Problem
+        self.unknown_columns = unknown_columns
+        self.ripple = RowDiff(rows.iloc[:0], rows.iloc[:0], [])
+
+    @property
+    def valid(self):
+        return self.rows[~self.rows.index.isin(self.errors['Row'] - 1)]
+
+    def summary(self):
+        bad = self.errors['Row'].nunique()
+        text = f"{len(self.rows)} rows read, {len(self.rows) - bad} valid, {bad} with errors"
+        if len(self.ripple.updates):
+            text += f"; {len(self.ripple.updates)} existing rows get new running totals"
+        return text
+
+
+def _problems(mask, rows, column, problem):
+    return pd.DataFrame({'Row': rows.index[mask] + 1, 'Column': column,
+                         'Value': rows.loc[mask, column].astype(str), 'Problem': problem})
+
+
+def validate_import(raw, existing_dates=(), locked_years=()):
+    """Check a raw batch against the schema and existing data; nothing is written."""
+    raw = raw.reset_index(drop=True)
+    unknown = [c for c in raw.columns if c not in ALL_COLUMNS]
+    rows = raw.reindex(columns=ALL_COLUMNS, fill_value='').astype(object)
+    found = []
+
+    dates = pd.to_datetime(rows[KEY_COLUMN], errors='coerce')
+    found.append(_problems(dates.isna(), rows, KEY_COLUMN, "not a date"))
+    days = dates.dt.date
+    found.append(_problems(dates.notna() & days.duplicated(keep=False), rows, KEY_COLUMN, "repeated in this file"))
+    found.append(_problems(dates.notna() & days.isin(set(existing_dates)), rows, KEY_COLUMN, "already entered"))
+    found.append(_problems(dates.dt.year.isin(list(locked_years)), rows, KEY_COLUMN, "year is read-only"))
+
+    for col in COUNT_COLUMNS:
+        text = rows[col].astype(str).str.strip()
+        values = pd.to_numeric(text, errors='coerce')
+        found.append(_problems((text != '') & (values.isna() | (values < 0)), rows, col, "not a non-negative number"))
+        rows[col] = values.fillna(0).astype('int64')
+
+    for col in DURATION_COLUMNS:
+        found.append(_problems(malformed_durations(rows[col]).to_numpy(), rows, col, "unreadable duration"))
+
+    # Issue names are matched case-insensitively; blanks become NoIssue
+    canonical = {name.lower(): name for name in ISSUE_CATEGORIES}
+    for col in ISSUE_COLUMNS:
+        text = rows[col].astype(str).str.strip()
+        matched = text.str.lower().map(canonical)
+        found.append(_problems((text != '') & matched.isna(), rows, col, "unknown issue"))
+        rows[col] = matched.where(matched.notna(), np.where(text == '', 'NoIssue', text))
+
+    valid_dates = dates.notna()
+    rows.loc[valid_dates, KEY_COLUMN] = dates[valid_dates].dt.strftime('%m/%d/%Y')
+    rows.loc[valid_dates, 'TempDate'] = dates[valid_dates].dt.strftime('%Y-%m-%d')
+    weekday = dates.dt.day_name()
+    for day in DAY_COLUMNS:
+        rows[day] = np.where(weekday == day, '1', '')
+
+    errors = pd.concat(found, ignore_index=True).sort_values(['Row', 'Column'], kind='stable')
+    return ImportReport(rows, errors.reset_index(drop=True), unknown)
+
+
+def plan_import(report, current, header):
+    """Fill running totals for the valid rows against current (a sheet frame); returns the RowDiff to write."""
+    valid = report.valid
+    if valid.empty:
+        return RowDiff(valid, valid, [])
+    dates = pd.to_datetime(current[KEY_COLUMN], errors='coerce') if len(current) else pd.Series(dtype='datetime64[ns]')
+    partition = current[scope_mask(dates, valid[KEY_COLUMN])]
+    filled, report.ripple = rollup_insert(partition, valid, header)
+    return RowDiff(key_rows(filled, header), report.ripple.updates, [], report.ripple.base)
+
+
+if __name__ == '__main__':
+    from storage import open_backend
+
+    parser = argparse.ArgumentParser(description="Validate a CSV/Excel file of daily entries and import it in one write.")
+    parser.add_argument('path')
+    parser.add_argument('--commit', action='store_true', help="write the rows (default is a dry run)")
+    parser.add_argument('--skip-invalid', action='store_true', help="import the valid rows even if others fail")
+    args = parser.parse_args()
+
+    backend = open_backend()
+    current = backend.read().fillna('')
+    current.columns = [c.strip() for c in current.columns]
+    header = list(current.columns) or ALL_COLUMNS
+    existing = set(pd.to_datetime(current[KEY_COLUMN], errors='coerce').dropna().dt.date) if len(current) else set()
+    report = validate_import(read_table(args.path, os.path.basename(args.path)), existing, backend.locked_years())
+    diff = plan_import(report, current, header)
+    if report.unknown_columns:
+        print("Ignored columns: " + ", ".join(report.unknown_columns))
+    if len(report.errors):
+        print(report.errors.to_string(index=False))
+    print(report.summary())
+    if args.commit:
+        if len(report.errors) and not args.skip_invalid:
+            raise SystemExit("Not imported: fix the errors above or pass --skip-invalid")
+        backend.apply(diff, header)
+        print(f"Imported: {diff.summary()}")
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# --- CACHED, DOWNSAMPLED SERIES ---
+# Production is summed per day (all presses), rolled up to week or month on
+# request, and reduced with Largest-Triangle-Three-Buckets when there are
+# more points than the chart can show. Series and figures are memoized per
+# data version, so reruns reuse the same figure object.
+
+GRANULARITIES = {'Day': 'D', 'Week': 'W-SUN', 'Month': 'M'}
+MAX_CHART_POINTS = 1500
+
+
+def production_series(df, year=None, granularity='Day'):
+    if df.empty:
+        return pd.Series(dtype='float64', index=pd.DatetimeIndex([], name='Date'), name='Production')
+    dates = df['ProductionDate_Parsed']
+    keep = dates.notna() if year is None else dates.dt.year == year
+    values = pd.to_numeric(df.loc[keep, 'DailyProductionTotal'], errors='coerce').fillna(0)
+    period = dates[keep].dt.to_period(GRANULARITIES[granularity]).dt.start_time
+    return values.groupby(period.rename('Date')).sum().sort_index().rename('Production')
+
+
+def get_daily_series(snapshot, year):
+    return snapshot.memo(('daily_series', year), lambda: production_series(snapshot.df, year, 'Day'))
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def chart_series(df, year=None, granularity='Day', max_points=MAX_CHART_POINTS):
+    series = production_series(df, year, granularity)
+    if len(series) > max_points:
+        x = series.index.asi8
+        series = series.iloc[lttb(x, series.to_numpy(), max_points)]
+    return series
+
+
+def get_chart_series(snapshot, year=None, granularity='Day', max_points=MAX_CHART_POINTS):
+    return snapshot.memo(('chart_series', year, granularity, max_points),
+                         lambda: chart_series(snapshot.df, year, granularity, max_points))
+
+
+def production_figure(series, title, daily_target=None, granularity='Day'):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Scatter(
+        x=series.index, y=series.to_numpy(),
+        mode='lines+markers' if len(series) <= 120 else 'lines',
+        line=dict(color='#0083B8'), name='Production'))
+    fig.update_layout(title=title, xaxis_title='Date', yaxis_title='Meters Produced')
+    if daily_target and granularity == 'Day':
+        fig.add_hline(y=daily_target, line_dash="dash", line_color="red", annotation_text="Daily Avg Target")
+    return fig
+
+
+def get_production_figure(snapshot, year, granularity, title, daily_target=None):
+    def build():
+        return production_figure(get_chart_series(snapshot, year, granularity), title, daily_target, granularity)
+    return snapshot.memo(('production_figure', year, granularity, title, daily_target), build)
@@ -0,0 +1,50 @@
+import os
+
+# --- RUNTIME SETTINGS ---
+# Every value can be overridden with an environment variable so the floor
+# tablets, the office PC and the CLI tools can share one code base.
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_years(name, default):
+    try:
+        return sorted({int(y) for y in os.environ.get(name, default).split(",") if y.strip()})
+    except ValueError:
+        return sorted(int(y) for y in default.split(","))
+
+# Where production data lives: "sheets" (Google Sheets) or "sqlite" (local store)
+STORAGE_BACKEND = os.environ.get("DPP_STORAGE_BACKEND", "sheets")
+SPREADSHEET_URL = os.environ.get(
+    "DPP_SPREADSHEET_URL", "https://docs.google.com/spreadsheets/d/1RmdsVRdN8Es6d9rAZVt8mUOLQyuz0tnHd8rkiXKVlTM/")
+SHEET_NAME = os.environ.get("DPP_SHEET_NAME", "Data")
+LOCAL_DB_PATH = os.environ.get("DPP_LOCAL_DB_PATH", "production.sqlite3")
+
+# Years whose rows are read-only, with or without the archive below (comma-separated)
+READ_ONLY_YEARS = _env_years("DPP_READ_ONLY_YEARS", "2024,2025")
+
+# Closed years are frozen into checksummed snapshots here and never re-read from the source
+ARCHIVE_ENABLED = os.environ.get("DPP_ARCHIVE_ENABLED", "1") == "1"
+ARCHIVE_DIR = os.environ.get("DPP_ARCHIVE_DIR", "archive")
+
+# Seconds between background re-reads of the sheet (0 disables the refresher)
+DATA_REFRESH_SECONDS = _env_int("DPP_DATA_REFRESH_SECONDS", 300)
+
+# Local write-ahead journal for submits, and how often its worker pushes to Sheets
+JOURNAL_PATH = os.environ.get("DPP_JOURNAL_PATH", "write_journal.sqlite3")
+SYNC_INTERVAL_SECONDS = _env_int("DPP_SYNC_INTERVAL_SECONDS", 5)
+
+# Rerun timing: off unless enabled here or with ?perf=1 on the page URL
+PERF_ENABLED = os.environ.get("DPP_PERF_ENABLED", "0") == "1"
+PERF_LOG = os.environ.get("DPP_PERF_LOG", "0") == "1"
+PERF_WINDOW = _env_int("DPP_PERF_WINDOW", 500)
+
+# Production targets per year (and optionally per press), plus the working-day calendar
+TARGETS_PATH = os.environ.get("DPP_TARGETS_PATH", "targets.json")
+
+# Read-only JSON metrics API served from the app's cache (0 disables it)
+API_HOST = os.environ.get("DPP_API_HOST", "127.0.0.1")
+API_PORT = _env_int("DPP_API_PORT", 0)
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pandas as pd
+
+# --- SHARED, VERSIONED DATA SNAPSHOT ---
+# One DataCache lives per server process (see st.cache_resource in the app).
+# Every browser session reads the same immutable Snapshot; a new Snapshot with
+# a higher version replaces it only when the sheet content actually changes.
+
+
+def fingerprint(df):
+    """Cheap content hash used to decide whether a reload changed anything."""
+    if df is None or df.empty:
+        return "0:0"
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    return f"{len(df)}:{int(row_hashes.sum()) & 0xFFFFFFFFFFFFFFFF:x}"
+
+
+class Snapshot:
+    def __init__(self, df, version, fingerprint):
+        self.df = df
+        self.version = version
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def memo(self, key, fn):
+        # Results derived from this snapshot are cached for its lifetime, so
+        # anything keyed here is implicitly keyed by the data version.
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = fn()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+
+class DataCache:
+    def __init__(self, loader, prepare=None, refresh_seconds=0, retry_seconds=5, max_backoff=300):
+        self._loader = loader
+        self._prepare = prepare
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.max_backoff = max_backoff
+        self._snapshot = None
+        self._stale = True
+        self._version = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self.last_error = None
+
+    @property
+    def version(self):
+        return self._snapshot.version if self._snapshot is not None else 0
+
+    def snapshot(self):
+        if self._snapshot is None:
+            # Nothing to fall back on: the first load's error goes to the caller
+            self.refresh(only_if_stale=True)
+        elif self._stale and time.time() >= self._retry_at:
+            try:
+                self.refresh(only_if_stale=True)
+            except Exception:
+                # Recorded in last_error; keep serving the last good snapshot
+                pass
+        return self._snapshot
+
+    def current(self):
+        # Latest snapshot without ever loading (None before the first load)
+        return self._snapshot
+
+    def invalidate(self):
+        # Called after our own writes; the next snapshot() call reloads.
+        self._stale = True
+
+    def refresh(self, only_if_stale=False):
+        with self._refresh_lock:
+            if only_if_stale and self._snapshot is not None and (not self._stale or time.time() < self._retry_at):
+                # Another session reloaded (or failed to) while this one waited for the lock
+                return self._snapshot
+            # Cleared before loading: an invalidate() during the load marks it stale again
+            self._stale = False
+            try:
+                raw = self._loader()
+                if raw is None:
+                    raw = pd.DataFrame()
+                fp = fingerprint(raw)
+                current = self._snapshot
+                if current is not None and current.fingerprint == fp:
+                    current.loaded_at = time.time()
+                else:
+                    df = self._prepare(raw) if self._prepare else raw
+                    self._version += 1
+                    self._snapshot = Snapshot(df, self._version, fp)
+            except Exception as e:
+                # Back off so every rerun does not hit the source again while it is down
+                self._stale = True
+                self._failures += 1
+                self._retry_at = time.time() + min(self.max_backoff, self.retry_seconds * 2 ** (self._failures - 1))
+                self.last_error = e
+                raise
+            self._failures = 0
+            self._retry_at = 0.0
+            self.last_error = None
+            return self._snapshot
+
+    def start(self):
+        if self.refresh_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, name="data-cache-refresh", daemon=True)
+        self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the last good snapshot; the app surfaces last_error.
+                pass
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+# --- SORTED DATE INDEX ---
+# Built once per data version. "YTD before date" is two binary searches into
+# a sorted date array plus a difference of prefix sums; "already entered?"
+# is a set lookup.
+
+INDEXED_MEASURES = {
+    'Production': 'DailyProductionTotal',
+    'Jobs': 'NoOfJobs',
+    'Trials': 'NoOfTrials',
+}
+
+
+class DateIndex:
+    def __init__(self, dates, prefix_sums):
+        self.dates = dates
+        self.prefix_sums = prefix_sums
+        self.date_set = frozenset(dates.astype(object))
+
+    def __contains__(self, day):
+        return pd.Timestamp(day).date() in self.date_set
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _position(self, day):
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(day).date(), 'D'), side='left'))
+
+    def ytd_before(self, day):
+        # Sum of every measure from Jan 1 of day's year up to (not including) day
+        day = pd.Timestamp(day).normalize()
+        start = self._position(day.replace(month=1, day=1))
+        end = self._position(day)
+        return {name: int(sums[end] - sums[start]) for name, sums in self.prefix_sums.items()}
+
+
+def build_date_index(df):
+    if df.empty or 'ProductionDate_Parsed' not in df.columns:
+        empty = np.array([], dtype='datetime64[D]')
+        return DateIndex(empty, {name: np.zeros(1) for name in INDEXED_MEASURES})
+    valid = df['ProductionDate_Parsed'].notna().to_numpy()
+    days = df.loc[valid, 'ProductionDate_Parsed'].to_numpy().astype('datetime64[D]')
+    order = np.argsort(days, kind='stable')
+    prefix_sums = {}
+    for name, col in INDEXED_MEASURES.items():
+        values = pd.to_numeric(df.loc[valid, col], errors='coerce').fillna(0).to_numpy()[order]
+        prefix_sums[name] = np.concatenate(([0], np.cumsum(values.astype('float64'))))
+    return DateIndex(days[order], prefix_sums)
+
+
+def get_date_index(snapshot):
+    return snapshot.memo('date_index', lambda: build_date_index(snapshot.df))
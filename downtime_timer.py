@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+# --- DOWNTIME EVENTS ---
+# Each event is {'issue': <ISSUE_CATEGORIES entry>, 'start': datetime, 'end': datetime | None}.
+# Several events can be logged per day; open events have end=None.
+
+
+def event_duration(event, now=None):
+    end = event['end'] or now or datetime.now()
+    return end - event['start']
+
+
+def total_downtime(events, now=None):
+    now = now or datetime.now()
+    return sum((event_duration(e, now) for e in events), timedelta(0))
+
+
+def format_timedelta(value):
+    return str(value).split('.')[0]
+
+
+def ticker_html(closed, running):
+    """A self-updating h:mm:ss display; ticks in the browser so no rerun is needed."""
+    closed_ms = int(closed.total_seconds() * 1000)
+    running_ms = [int(r.total_seconds() * 1000) for r in running]
+    return f"""
+    <div style="font-family: 'Source Sans Pro', sans-serif;">
+      <div style="font-size: 14px; color: rgb(49, 51, 63);">Current Session</div>
+      <div id="downtime" style="font-size: 36px; color: rgb(49, 51, 63);"></div>
+    </div>
+    <script>
+    const closedMs = {closed_ms};
+    const runningMs = {running_ms};
+    const loadedAt = performance.now();
+    function pad(n) {{ return String(n).padStart(2, '0'); }}
+    function tick() {{
+      const since = performance.now() - loadedAt;
+      const total = closedMs + runningMs.reduce((sum, ms) => sum + ms + since, 0);
+      const s = Math.floor(total / 1000);
+      document.getElementById('downtime').textContent =
+        Math.floor(s / 3600) + ':' + pad(Math.floor(s % 3600 / 60)) + ':' + pad(s % 60);
+    }}
+    tick();
+    if (runningMs.length) setInterval(tick, 1000);
+    </script>
+    """
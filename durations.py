@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# --- DURATION PARSING ---
+# The sheet holds durations in several shapes depending on which app wrote
+# the row: "45 mins", "1 hr 30 min", "0:45:00", "45:00" (m:s) or
+# "1 day, 2:00:00" (str(timedelta)). Everything is parsed with vectorized
+# string ops into integer seconds; bare numbers are taken as minutes.
+
+DURATION_COLUMNS = ['CleanMachineAm', 'CleanMachinePm', 'CleanMachineTotal', 'IssueResolutionTotal']
+SECONDS_SUFFIX = '_Sec'
+
+_CLOCK = r'^(?:(?P<d>\d+)\s*days?,?\s*)?(?:(?P<h>\d+):)?(?P<m>\d+):(?P<s>\d+)(?:\.\d+)?$'
+_WORDS = (r'^(?=\d)(?:(?P<h>\d+(?:\.\d+)?)\s*(?:h|hr|hrs|hour|hours)\b\s*)?'
+          r'(?:(?P<m>\d+(?:\.\d+)?)\s*(?:m|min|mins|minute|minutes)\b)?$')
+_NUMBER = r'^(?P<m>\d+(?:\.\d+)?)$'
+
+
+def seconds_column(col):
+    return col + SECONDS_SUFFIX
+
+
+def _parse_unique(values):
+    text = pd.Series(values, dtype=object).astype(str).str.strip().str.lower()
+    blank = text.isin(['', 'nan', 'none', 'nat'])
+    seconds = pd.Series(0.0, index=text.index)
+    parsed = blank.copy()
+
+    clock = text.str.extract(_CLOCK).astype(float)
+    hit = clock['m'].notna() & ~parsed
+    seconds[hit] = (clock['d'].fillna(0) * 86400 + clock['h'].fillna(0) * 3600
+                    + clock['m'] * 60 + clock['s'])[hit]
+    parsed |= hit
+
+    words = text.str.extract(_WORDS).astype(float)
+    hit = (words['h'].notna() | words['m'].notna()) & ~parsed
+    seconds[hit] = (words['h'].fillna(0) * 3600 + words['m'].fillna(0) * 60)[hit]
+    parsed |= hit
+
+    number = text.str.extract(_NUMBER).astype(float)
+    hit = number['m'].notna() & ~parsed
+    seconds[hit] = (number['m'] * 60)[hit]
+    parsed |= hit
+
+    return seconds.round().astype('int64').to_numpy(), (~parsed).to_numpy()
+
+
+def parse_durations(values):
+    """Return (int64 seconds, malformed count). Blanks count as 0, not malformed."""
+    values = pd.Series(values, dtype=object)
+    # A column holds only a few distinct strings, so parse each one once
+    codes, uniques = pd.factorize(values)
+    unique_seconds, unique_bad = _parse_unique(uniques)
+    unique_seconds = np.append(unique_seconds, 0)
+    unique_bad = np.append(unique_bad, False)
+    seconds = pd.Series(unique_seconds[codes], index=values.index)
+    return seconds, int(unique_bad[codes].sum())
+
+
+def malformed_durations(values):
+    """Boolean mask of values that are neither blank nor a recognised duration."""
+    values = pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(values)
+    _seconds, unique_bad = _parse_unique(uniques)
+    return pd.Series(np.append(unique_bad, False)[codes], index=values.index)
+
+
+def add_duration_seconds(df, columns=DURATION_COLUMNS):
+    """Add a <col>_Sec column per duration column; returns malformed counts per column."""
+    malformed = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        df[seconds_column(col)], malformed[col] = parse_durations(df[col])
+    return malformed
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
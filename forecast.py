@@ -0,0 +1,146 @@
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import TARGETS_PATH
+
+# --- TARGETS & RUN-RATE FORECAST ---
+# Targets come from targets.json: a default, per-year overrides and per-press
+# per-year overrides, plus the working-day calendar (np.busday weekmask and
+# holidays). Forecasts read a year's daily production series (memoized per
+# data version) through a prefix sum, so any "as of" date is O(1).
+
+RUN_RATE_WINDOWS = (7, 28)
+_DEFAULT_TARGETS = {'default': {'annual': 9680000, 'daily': 38600}, 'years': {}, 'presses': {},
+                    'weekmask': 'Mon Tue Wed Thu Fri', 'holidays': []}
+
+
+class Targets:
+    def __init__(self, config=None):
+        config = {**_DEFAULT_TARGETS, **(config or {})}
+        self.default = config['default']
+        self.years = config['years']
+        self.presses = config['presses']
+        self.weekmask = config['weekmask']
+        self.holidays = np.array(config['holidays'], dtype='datetime64[D]')
+
+    def working_days(self, start, end):
+        """Working days in [start, end)."""
+        return int(np.busday_count(np.datetime64(start, 'D'), np.datetime64(end, 'D'),
+                                   weekmask=self.weekmask, holidays=self.holidays))
+
+    def for_year(self, year, press=None):
+        # Press settings override the year's, which override the default
+        target = {**self.default, **self.years.get(str(year), {})}
+        if press is not None:
+            target.update(self.presses.get(press, {}).get(str(year), {}))
+        if not target.get('daily'):
+            days = self.working_days(date(year, 1, 1), date(year + 1, 1, 1))
+            target['daily'] = target['annual'] / days if days else 0
+        return target
+
+    def key(self, year, press=None):
+        """Hashable form of everything a forecast for year depends on, for memo keys."""
+        return (tuple(sorted(self.for_year(year, press).items())), self.weekmask, tuple(self.holidays.astype(str)))
+
+
+def load_targets(path=TARGETS_PATH):
+    try:
+        with open(path) as f:
+            return Targets(json.load(f))
+    except FileNotFoundError:
+        return Targets()
+
+
+class Forecast:
+    def __init__(self, year, as_of, target, ytd, run_rates, working_days_elapsed, working_days_left, working_days_total):
+        self.year = year
+        self.as_of = as_of
+        self.annual_target = target['annual']
+        self.daily_target = target['daily']
+        self.ytd = ytd
+        self.run_rates = run_rates      # {window in working days: production per working day}
+        self.working_days_elapsed = working_days_elapsed
+        self.working_days_left = working_days_left
+        self.working_days_total = working_days_total
+
+    @property
+    def progress(self):
+        return self.ytd / self.annual_target * 100 if self.annual_target else 0.0
+
+    @property
+    def expected_to_date(self):
+        # Where a straight working-day pace towards the target would be now
+        if not self.working_days_total:
+            return 0.0
+        return self.annual_target * self.working_days_elapsed / self.working_days_total
+
+    @property
+    def run_rate(self):
+        return self.run_rates[max(self.run_rates)] if self.run_rates else 0.0
+
+    @property
+    def projected(self):
+        return self.ytd + self.run_rate * self.working_days_left
+
+    @property
+    def required_daily(self):
+        remaining = max(self.annual_target - self.ytd, 0)
+        if not self.working_days_left:
+            return 0.0 if not remaining else float('inf')
+        return remaining / self.working_days_left
+
+    @property
+    def on_track(self):
+        return self.projected >= self.annual_target
+
+    def metric_rows(self):
+        rows = [
+            ("Annual target", f"{self.annual_target:,.0f} m"),
+            ("Progress", f"{self.progress:.1f}% (pace {self.expected_to_date:,.0f} m)"),
+        ]
+        rows += [(f"Run rate ({n} working days)", f"{rate:,.0f} m/day") for n, rate in sorted(self.run_rates.items())]
+        required = (f"{self.required_daily:,.0f} m ({self.working_days_left} days left)"
+                    if np.isfinite(self.required_daily) else "target missed")
+        rows += [("Projected year-end", f"{self.projected:,.0f} m"), ("Required per working day", required)]
+        return rows
+
+
+def compute_forecast(daily, year, targets, as_of=None, press=None, windows=RUN_RATE_WINDOWS):
+    """Forecast for year from its daily production series (DatetimeIndex -> production)."""
+    target = targets.for_year(year, press)
+    jan1, next_jan1 = date(year, 1, 1), date(year + 1, 1, 1)
+    # Never past today: days that have not happened would count as zero production
+    as_of = min(pd.Timestamp(as_of or date.today()).date(), date.today(), date(year, 12, 31))
+    calendar = pd.date_range(jan1, as_of, freq='D')
+    cumulative = np.concatenate(([0.0], daily.reindex(calendar, fill_value=0).to_numpy(dtype='float64').cumsum()))
+
+    def total_since(day):
+        # Production from day through as_of, via the prefix sum
+        offset = max((day - jan1).days, 0)
+        return cumulative[-1] - cumulative[min(offset, len(cumulative) - 1)]
+
+    run_rates = {}
+    elapsed = max(targets.working_days(jan1, as_of + timedelta(days=1)), 0)
+    for n in windows:
+        n_days = min(n, elapsed)
+        if not n_days:
+            continue
+        first = np.busday_offset(np.datetime64(as_of, 'D'), -(n_days - 1), roll='backward',
+                                 weekmask=targets.weekmask, holidays=targets.holidays)
+        run_rates[n] = total_since(pd.Timestamp(first).date()) / n_days
+    return Forecast(
+        year, as_of, target, ytd=float(cumulative[-1]), run_rates=run_rates,
+        working_days_elapsed=elapsed,
+        working_days_left=targets.working_days(max(as_of + timedelta(days=1), jan1), next_jan1),
+        working_days_total=targets.working_days(jan1, next_jan1),
+    )
+
+
+def get_forecast(snapshot, daily, year, targets, as_of=None, press=None):
+    as_of = min(pd.Timestamp(as_of or date.today()).date(), date.today())
+    # Keyed by the target values too, so editing targets.json takes effect without new data
+    key = ('forecast', year, as_of, press, targets.key(year, press))
+    return snapshot.memo(key, lambda: compute_forecast(daily, year, targets, as_of, press))
@@ -0,0 +1,174 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from schema import ISSUE_COLUMNS
+
+# --- LONG-FORM ISSUE INDEX ---
+# ProductionIssues_1..10 reshaped to one row per (record, issue), indexed by
+# (Date, Issue), with NoIssue padding and repeats dropped. The melt runs per
+# year partition and a partition is only redone when its rows change, so a new
+# snapshot normally re-melts the live year alone; frozen years never again.
+
+_SIGNATURE_COLUMNS = ['ProductionDate_Parsed', 'DailyProductionTotal', 'IssueResolutionTotal_Sec'] + ISSUE_COLUMNS
+
+
+class IssueTable:
+    def __init__(self, issues, records):
+        self.issues = issues    # index (Date, Issue); column Record
+        self.records = records  # one row per record: Record, Date, Production, DowntimeSec
+
+    def between(self, start=None, end=None):
+        if start is None and end is None:
+            return self
+        start = pd.Timestamp(start) if start is not None else pd.Timestamp.min
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+        dates = self.issues.index.get_level_values('Date')
+        keep = (dates >= start) & (dates <= end)
+        days = self.records['Date']
+        return IssueTable(self.issues[keep], self.records[(days >= start) & (days <= end)])
+
+
+def _numeric(part, col):
+    if col not in part.columns:
+        return np.zeros(len(part), dtype='int64')
+    return pd.to_numeric(part[col], errors='coerce').fillna(0).to_numpy().astype('int64')
+
+
+def melt_issues(part):
+    """Long-form issues for one partition; Record is the row position within part."""
+    n = len(part)
+    records = pd.DataFrame({
+        'Record': np.arange(n, dtype='int64'),
+        'Date': part['ProductionDate_Parsed'].to_numpy(),
+        'Production': _numeric(part, 'DailyProductionTotal'),
+        'DowntimeSec': _numeric(part, 'IssueResolutionTotal_Sec'),
+    })
+    cols = [c for c in ISSUE_COLUMNS if c in part.columns]
+    if not cols or not n:
+        return pd.DataFrame({'Record': pd.Series(dtype='int64'), 'Date': pd.Series(dtype='datetime64[ns]'),
+                             'Issue': pd.Categorical([])}), records
+    flat = pd.Categorical(union_categoricals([pd.Categorical(part[c]) for c in cols], ignore_order=True))
+    record = np.tile(records['Record'].to_numpy(), len(cols))
+    codes = flat.codes.astype('int64')
+    real = codes >= 0
+    for blank in ('NoIssue', ''):
+        if blank in flat.categories:
+            real &= codes != flat.categories.get_loc(blank)
+    # An issue listed twice on one record counts once
+    pair = np.unique(record[real] * len(flat.categories) + codes[real])
+    record, codes = pair // len(flat.categories), pair % len(flat.categories)
+    issues = pd.DataFrame({
+        'Record': record,
+        'Date': records['Date'].to_numpy()[record],
+        'Issue': pd.Categorical.from_codes(codes, dtype=flat.dtype),
+    })
+    return issues, records
+
+
+class IssueIndex:
+    def __init__(self):
+        self._parts = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, part, frozen):
+        if frozen:
+            return ('frozen', len(part))
+        cols = [c for c in _SIGNATURE_COLUMNS if c in part.columns]
+        return (len(part), int(pd.util.hash_pandas_object(part[cols], index=False).sum()))
+
+    def update(self, df, frozen_years=()):
+        """Bring the index in line with df, re-melting only the year partitions that changed."""
+        if df.empty or 'ProductionDate_Parsed' not in df.columns:
+            self._parts = {}
+            return _assemble([])
+        dated = df[df['ProductionDate_Parsed'].notna()]
+        frozen = set(frozen_years)
+        with self._lock:
+            parts = {}
+            for year, part in dated.groupby(dated['ProductionDate_Parsed'].dt.year, sort=True):
+                signature = self._signature(part, year in frozen)
+                cached = self._parts.get(year)
+                parts[year] = cached if cached and cached[0] == signature else (signature, *melt_issues(part))
+            self._parts = parts
+            return _assemble([parts[y][1:] for y in sorted(parts)])
+
+
+def _assemble(parts):
+    if not parts:
+        issues, records = melt_issues(pd.DataFrame({'ProductionDate_Parsed': pd.Series(dtype='datetime64[ns]')}))
+        return IssueTable(issues.set_index(['Date', 'Issue']), records)
+    # Record ids are partition-local; offset them so they are unique overall
+    offsets = np.cumsum([0] + [len(records) for _, records in parts[:-1]])
+    issue_frames, record_frames = [], []
+    for (issues, records), offset in zip(parts, offsets):
+        issue_frames.append(issues.assign(Record=issues['Record'] + offset))
+        record_frames.append(records.assign(Record=records['Record'] + offset))
+    issue_col = union_categoricals([f['Issue'] for f in issue_frames], ignore_order=True)
+    issues = pd.concat([f.drop(columns='Issue') for f in issue_frames], ignore_index=True)
+    issues['Issue'] = issue_col
+    issues = issues.sort_values(['Date', 'Record'], kind='stable').set_index(['Date', 'Issue'])
+    return IssueTable(issues, pd.concat(record_frames, ignore_index=True))
+
+
+# --- ISSUE ANALYTICS ---
+def issue_pareto(table):
+    """Records per issue, most frequent first, with share and cumulative share."""
+    counts = table.issues.groupby(level='Issue', observed=True).size().sort_values(ascending=False)
+    counts = counts[counts > 0]
+    total = counts.sum()
+    return pd.DataFrame({
+        'Count': counts,
+        'Share': counts / total if total else counts * 0.0,
+        'CumulativeShare': counts.cumsum() / total if total else counts * 0.0,
+    })
+
+
+def issue_cooccurrence(table):
+    """Pairs of issues logged on the same record, most frequent first."""
+    long = table.issues.reset_index()[['Record', 'Issue']]
+    if long.empty:
+        return pd.DataFrame(columns=['IssueA', 'IssueB', 'Count', 'ShareOfA'])
+    codes = long['Issue'].cat.codes.to_numpy().astype('int64')
+    pairs = long.assign(Code=codes).merge(long.assign(Code=codes), on='Record', suffixes=('A', 'B'))
+    pairs = pairs[pairs['CodeA'] < pairs['CodeB']]
+    counts = pairs.groupby(['IssueA', 'IssueB'], observed=True).size().rename('Count').reset_index()
+    per_issue = long.groupby('Issue', observed=True).size()
+    counts['ShareOfA'] = counts['Count'] / counts['IssueA'].map(per_issue).astype('float64')
+    return counts.sort_values('Count', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def issue_production_correlation(table, freq='W', min_periods=3):
+    """Per issue: correlation between its count and total production across weeks ('W') or months ('M')."""
+    records = table.records
+    if records.empty:
+        return pd.DataFrame(columns=['Periods', 'Correlation'])
+    period = records['Date'].dt.to_period(freq)
+    production = records['Production'].groupby(period).sum()
+    issues = table.issues.reset_index()
+    counts = pd.crosstab(issues['Date'].dt.to_period(freq), issues['Issue']).reindex(production.index, fill_value=0)
+    periods = (counts > 0).sum()
+    keep = periods[periods >= min_periods].index
+    result = pd.DataFrame({
+        'Periods': periods[keep],
+        'Correlation': counts[keep].corrwith(production),
+    }).dropna()
+    return result.sort_values('Correlation', kind='stable')
+
+
+def get_issue_table(snapshot, index, frozen_years=()):
+    return snapshot.memo('issue_table', lambda: index.update(snapshot.df, frozen_years))
+
+
+def get_issue_analytics(snapshot, index, frozen_years=(), start=None, end=None, freq='W'):
+    # Cached per data version and filter, so reruns only pay for a dict lookup
+    def compute():
+        table = get_issue_table(snapshot, index, frozen_years).between(start, end)
+        return {
+            'pareto': issue_pareto(table),
+            'cooccurrence': issue_cooccurrence(table),
+            'correlation': issue_production_correlation(table, freq),
+        }
+    return snapshot.memo(('issue_analytics', start, end, freq), compute)
@@ -0,0 +1,199 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from sheets_io import DuplicateRowError, InvalidRowError, LockedRowError, to_cell
+
+# --- LOCAL WRITE-AHEAD JOURNAL ---
+# A submit is committed to SQLite first and returns immediately. SyncWorker
+# pushes pending rows to the sheet in batches, retrying with backoff, so a
+# slow or unreachable Sheets API never loses an operator's entry. Rows that
+# can never sync are parked as conflicts until the operator retries or
+# discards them.
+
+PENDING, SYNCED, CONFLICT, DISCARDED = 'pending', 'synced', 'conflict', 'discarded'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    row_key TEXT NOT NULL,
+    header TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    synced_at REAL
+)
+"""
+
+# At most one pending row per date: a second one could only ever clash
+_PENDING_KEY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS journal_pending_key ON journal (row_key) WHERE status = 'pending'"
+
+
+class WriteJournal:
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+            # Journals written before the index may hold a second pending row for a date
+            db.execute(
+                "UPDATE journal SET status = ?, last_error = ? WHERE status = ? AND id NOT IN "
+                "(SELECT MIN(id) FROM journal WHERE status = ? GROUP BY row_key)",
+                (CONFLICT, "Another entry for this date was already queued", PENDING, PENDING))
+            db.execute(_PENDING_KEY_INDEX)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def enqueue(self, rows, header, key_column='ProductionDate'):
+        now = time.time()
+        records = [
+            (str(row[key_column]), json.dumps(header), json.dumps([to_cell(row.get(c)) for c in header]), now)
+            for row in rows.to_dict('records')
+        ]
+        try:
+            with self._connect() as db:
+                db.executemany("INSERT INTO journal (row_key, header, payload, created_at) VALUES (?, ?, ?, ?)",
+                               records)
+        except sqlite3.IntegrityError:
+            keys = ", ".join(sorted({key for key, *_ in records}))
+            raise DuplicateRowError(f"An entry for {keys} is already waiting to sync")
+
+    def pending(self, limit=None):
+        sql = "SELECT id, row_key, header, payload, attempts FROM journal WHERE status = ? ORDER BY id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._connect() as db:
+            return db.execute(sql, (PENDING,)).fetchall()
+
+    def pending_keys(self):
+        with self._connect() as db:
+            return {k for (k,) in db.execute("SELECT row_key FROM journal WHERE status = ?", (PENDING,))}
+
+    def mark(self, ids, status, error=None):
+        synced_at = time.time() if status == SYNCED else None
+        with self._connect() as db:
+            db.executemany(
+                "UPDATE journal SET status = ?, last_error = ?, synced_at = ? WHERE id = ?",
+                [(status, error, synced_at, i) for i in ids])
+
+    def record_failure(self, ids, error):
+        with self._connect() as db:
+            db.executemany(
+                "UPDATE journal SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                [(str(error), i) for i in ids])
+
+    def requeue(self, ids):
+        """Send conflict rows back to the sync queue (e.g. after the clashing row was fixed)."""
+        try:
+            with self._connect() as db:
+                db.executemany(
+                    "UPDATE journal SET status = ?, attempts = 0, last_error = NULL WHERE id = ? AND status = ?",
+                    [(PENDING, int(i), CONFLICT) for i in ids])
+        except sqlite3.IntegrityError:
+            raise DuplicateRowError("Another entry for the same date is already waiting to sync")
+
+    def discard(self, ids):
+        with self._connect() as db:
+            db.executemany("UPDATE journal SET status = ? WHERE id = ? AND status = ?",
+                           [(DISCARDED, int(i), CONFLICT) for i in ids])
+
+    def status_counts(self):
+        with self._connect() as db:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM journal GROUP BY status").fetchall())
+        return {s: counts.get(s, 0) for s in (PENDING, SYNCED, CONFLICT)}
+
+    def recent(self, limit=20, status=None):
+        """Latest rows with the values they carry, one column per header field."""
+        sql = "SELECT id, row_key, status, attempts, last_error, created_at, synced_at, header, payload FROM journal"
+        params = ()
+        if status:
+            sql += " WHERE status = ?"
+            params = (status,)
+        with self._connect() as db:
+            rows = pd.read_sql_query(sql + " ORDER BY id DESC LIMIT ?", db, params=params + (limit,))
+        values = pd.DataFrame([dict(zip(json.loads(h), json.loads(p))) for h, p in zip(rows['header'], rows['payload'])],
+                              index=rows.index)
+        return pd.concat([rows.drop(columns=['header', 'payload']), values], axis=1)
+
+
+class SyncWorker:
+    def __init__(self, journal, push, interval=5, batch_size=200, max_backoff=300, on_synced=None):
+        self.journal = journal
+        self.push = push
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.on_synced = on_synced
+        self.last_error = None
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-sync", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        failures = 0
+        while True:
+            delay = min(self.max_backoff, self.interval * (2 ** failures)) if failures else self.interval
+            self._wake.wait(delay)
+            self._wake.clear()
+            try:
+                self.sync_once()
+                failures = 0
+            except Exception as e:
+                self.last_error = e
+                failures += 1
+
+    def sync_once(self):
+        """Push every pending batch; returns the number of rows synced."""
+        synced = 0
+        while True:
+            batch = self.journal.pending(limit=self.batch_size)
+            if not batch:
+                break
+            # Group by header so each push is a single append of same-shaped rows
+            groups = {}
+            for row_id, _key, header, payload, _attempts in batch:
+                groups.setdefault(header, []).append((row_id, json.loads(payload)))
+            for header, rows in groups.items():
+                header = json.loads(header)
+                frame = pd.DataFrame([values for _, values in rows], columns=header)
+                synced += self._push_rows([row_id for row_id, _ in rows], frame, header)
+        self.last_error = None
+        if synced and self.on_synced:
+            self.on_synced()
+        return synced
+
+    def _push_rows(self, ids, frame, header):
+        try:
+            self.push(frame, header)
+        except (DuplicateRowError, LockedRowError, InvalidRowError) as e:
+            if len(ids) > 1:
+                # Isolate the clashing row(s) so the rest of the batch still syncs
+                return sum(self._push_rows([i], frame.iloc[[n]], header) for n, i in enumerate(ids))
+            # Retrying cannot succeed; keep the row for the operator to resolve
+            self.journal.mark(ids, CONFLICT, str(e))
+            return 0
+        except Exception as e:
+            self.journal.record_failure(ids, e)
+            raise
+        self.journal.mark(ids, SYNCED)
+        return len(ids)
@@ -0,0 +1,12 @@
+from datetime import timedelta
+
+from durations import seconds_column
+
+# --- YTD DOWNTIME ---
+# Shared by the Streamlit page and the benchmark harness.
+
+
+def calculate_ytd_downtime(historical_df, year):
+    if historical_df.empty: return timedelta(0)
+    ytd_mask = historical_df['ProductionDate_Parsed'].dt.year == year
+    return timedelta(seconds=int(historical_df.loc[ytd_mask, seconds_column('IssueResolutionTotal')].sum()))
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from aggregates import get_aggregates
+from charts import GRANULARITIES, get_chart_series, get_daily_series
+from config import API_HOST, API_PORT, DATA_REFRESH_SECONDS, TARGETS_PATH
+from forecast import get_forecast, load_targets
+from issues import IssueIndex, get_issue_analytics
+
+# --- READ-ONLY METRICS API ---
+# The header metrics, production series and issue breakdowns as JSON, served
+# from the same DataCache snapshot the dashboard uses. Requests never touch the
+# storage backend: they read whatever snapshot the refresher last loaded. The
+# ETag is the snapshot fingerprint, today's date (forecasts move daily) and a
+# digest of the requested year's targets (re-read when targets.json changes),
+# so pollers that send If-None-Match get a 304 before anything is computed, and
+# bodies are memoized per snapshot like every other derived result.
+
+PATHS = ('/metrics', '/series', '/issues')
+ISSUE_PERIODS = ('W', 'M')
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json_default(value):
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if isinstance(value, np.floating):
+        return _finite(float(value))
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, pd.Period):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _finite(value):
+    # JSON has no inf/NaN; "no value" is null
+    return value if math.isfinite(value) else None
+
+
+def _int_arg(query, name, default=None):
+    raw = query.get(name, [None])[-1]
+    if raw in (None, ''):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer, got {raw!r}")
+    return value
+
+
+def _choice_arg(query, name, options, default):
+    value = query.get(name, [default])[-1]
+    if value not in options:
+        raise BadRequest(f"{name} must be one of {', '.join(options)}, got {value!r}")
+    return value
+
+
+def _records(frame, index=True):
+    return (frame.reset_index() if index else frame).to_dict('records')
+
+
+def metrics_body(snapshot, targets, query):
+    aggregates = get_aggregates(snapshot)
+    year = _int_arg(query, 'year', date.today().year)
+    forecast = get_forecast(snapshot, get_daily_series(snapshot, year), year, targets)
+    return {
+        'year': year,
+        'ytd': {measure: aggregates.total(year, measure) for measure in ('Production', 'Jobs', 'Trials', 'DowntimeSec')},
+        'yearly': _records(aggregates.yearly),
+        'forecast': {
+            'as_of': forecast.as_of,
+            'annual_target': forecast.annual_target,
+            'daily_target': forecast.daily_target,
+            'progress': forecast.progress,
+            'expected_to_date': forecast.expected_to_date,
+            'run_rates': {str(n): rate for n, rate in forecast.run_rates.items()},
+            'projected': forecast.projected,
+            'required_daily': _finite(forecast.required_daily),
+            'working_days_left': forecast.working_days_left,
+            'on_track': forecast.on_track,
+        },
+    }
+
+
+def series_body(snapshot, query):
+    year = _int_arg(query, 'year')
+    granularity = _choice_arg(query, 'granularity', list(GRANULARITIES), 'Day')
+    series = get_chart_series(snapshot, year, granularity)
+    return {
+        'year': year,
+        'granularity': granularity,
+        'points': [{'date': day, 'production': value} for day, value in series.items()],
+    }
+
+
+def issues_body(snapshot, index, frozen_years, query):
+    year = _int_arg(query, 'year')
+    freq = _choice_arg(query, 'freq', ISSUE_PERIODS, 'W')
+    top = _int_arg(query, 'top', 10)
+    start, end = (date(year, 1, 1), date(year, 12, 31)) if year else (None, None)
+    analytics = get_issue_analytics(snapshot, index, frozen_years, start, end, freq)
+    return {
+        'year': year,
+        'pareto': _records(analytics['pareto'].head(top)),
+        'cooccurrence': _records(analytics['cooccurrence'].head(top), index=False),
+        'correlation': _records(analytics['correlation']),
+    }
+
+
+class MetricsApi:
+    """Routes a request to a JSON body computed from the current snapshot."""
+
+    def __init__(self, cache, issue_index=None, targets=None, frozen_years=(), targets_path=TARGETS_PATH):
+        self.cache = cache
+        self.issue_index = issue_index or IssueIndex()
+        self.frozen_years = frozen_years
+        self.targets_path = targets_path
+        # Fixed targets (tests, embedding) are used as given; otherwise the file is followed
+        self._fixed_targets = targets
+        self._targets = None
+        self._targets_mtime = None
+        self._lock = threading.Lock()
+
+    def targets(self):
+        if self._fixed_targets is not None:
+            return self._fixed_targets
+        try:
+            mtime = os.stat(self.targets_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            if self._targets is None or mtime != self._targets_mtime:
+                self._targets, self._targets_mtime = load_targets(self.targets_path), mtime
+            return self._targets
+
+    def etag(self, snapshot, query, targets):
+        year = _int_arg(query, 'year', date.today().year)
+        digest = hashlib.sha1(repr(targets.key(year)).encode('utf-8')).hexdigest()[:8]
+        return f'"{snapshot.fingerprint}-{date.today():%Y%m%d}-{digest}"'
+
+    def body(self, snapshot, path, query, targets):
+        routes = {
+            '/metrics': lambda: metrics_body(snapshot, targets, query),
+            '/series': lambda: series_body(snapshot, query),
+            '/issues': lambda: issues_body(snapshot, self.issue_index, self.frozen_years, query),
+        }
+        year = _int_arg(query, 'year', date.today().year)
+        key = ('api', path, tuple(sorted((k, tuple(v)) for k, v in query.items())), date.today(), targets.key(year))
+        return snapshot.memo(key, lambda: json.dumps(routes[path](), default=_json_default).encode('utf-8'))
+
+    def health(self):
+        snapshot = self.cache.current()
+        error = self.cache.last_error
+        return json.dumps({
+            'version': snapshot.version if snapshot else 0,
+            'loaded_at': datetime.fromtimestamp(snapshot.loaded_at) if snapshot else None,
+            'last_error': str(error) if error is not None else None,
+        }, default=_json_default).encode('utf-8')
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body=b'', headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def _error(self, status, message):
+            self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/health':
+                return self._send(200, api.health(), [('Cache-Control', 'no-cache')])
+            if url.path not in PATHS:
+                return self._error(404, f"unknown path {url.path}; try {', '.join(PATHS)} or /health")
+            snapshot = api.cache.current()
+            if snapshot is None:
+                return self._error(503, "data not loaded yet")
+            query = parse_qs(url.query)
+            targets = api.targets()
+            try:
+                etag = api.etag(snapshot, query, targets)
+                headers = [('ETag', etag), ('X-Data-Version', str(snapshot.version)), ('Cache-Control', 'no-cache')]
+                if etag in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]:
+                    return self._send(304, headers=headers)
+                body = api.body(snapshot, url.path, query, targets)
+            except BadRequest as e:
+                return self._error(400, str(e))
+            self._send(200, body, headers)
+
+        def log_message(self, format, *args):
+            # Pollers hit this every few seconds; keep the console for the app
+            pass
+
+    return Handler
+
+
+def start_metrics_api(api, host=API_HOST, port=API_PORT):
+    """Serve api on a daemon thread; returns the server (port 0 here picks a free port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-api", daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    from data_cache import DataCache
+    from schema import prepare_frame
+    from storage import open_backend
+
+    parser = argparse.ArgumentParser(description="Serve production metrics as JSON from a cached snapshot.")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT or 8502)
+    args = parser.parse_args()
+
+    backend = open_backend()
+    cache = DataCache(loader=backend.read, prepare=prepare_frame, refresh_seconds=DATA_REFRESH_SECONDS)
+    cache.refresh()
+    cache.start()
+    server = ThreadingHTTPServer((args.host, args.port),
+                                 make_handler(MetricsApi(cache, frozen_years=backend.frozen_years())))
+    print(f"Serving metrics on http://{args.host}:{server.server_port}")
+    server.serve_forever()
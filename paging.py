@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from schema import ISSUE_COLUMNS
+
+# --- SERVER-SIDE PAGING ---
+# Only the requested page of a table is sent to the browser. Rows are sorted
+# by date once per data version, so a date range is two binary searches.
+
+
+def sorted_by_date(df, years=None):
+    rows = df[df['ProductionDate_Parsed'].notna()]
+    if years is not None:
+        rows = rows[rows['ProductionDate_Parsed'].dt.year.isin(list(years))]
+    return rows.sort_values('ProductionDate_Parsed', kind='stable')
+
+
+def get_sorted_archive(snapshot, years):
+    return snapshot.memo(('archive', tuple(years)), lambda: sorted_by_date(snapshot.df, years))
+
+
+def get_sorted_rows(snapshot):
+    return snapshot.memo('sorted_rows', lambda: sorted_by_date(snapshot.df))
+
+
+def filter_rows(sorted_rows, start=None, end=None, issues=()):
+    dates = sorted_rows['ProductionDate_Parsed'].to_numpy()
+    lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), 'left') if start else 0
+    hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)), 'left') if end else len(dates)
+    rows = sorted_rows.iloc[lo:hi]
+    if issues:
+        cols = [c for c in ISSUE_COLUMNS if c in rows.columns]
+        rows = rows[rows[cols].isin(list(issues)).any(axis=1)]
+    return rows
+
+
+def page_of(rows, page, page_size, newest_first=True):
+    """Return (page_rows, page_count); page is 1-based."""
+    pages = max(1, math.ceil(len(rows) / page_size))
+    page = min(max(1, page), pages)
+    if newest_first:
+        end = len(rows) - (page - 1) * page_size
+        return rows.iloc[max(0, end - page_size):end].iloc[::-1], pages
+    start = (page - 1) * page_size
+    return rows.iloc[start:start + page_size], pages
+
+
+def recent_rows(df, k=10):
+    # Top-k selection instead of sorting the whole frame
+    return df.nlargest(k, 'ProductionDate_Parsed')
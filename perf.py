@@ -0,0 +1,130 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+# --- RERUN TIMING ---
+# A PerfRun collects spans for one script run; PerfRecorder keeps a rolling
+# window of per-run durations for each span, shared by every session. When
+# timing is off, start_run() hands back a no-op run whose span() is a shared
+# nullcontext, so the instrumented page pays only an attribute lookup.
+
+log = logging.getLogger('perf')
+
+_NOOP = nullcontext()
+
+
+class _DisabledRun:
+    enabled = False
+
+    def span(self, name):
+        return _NOOP
+
+    def lap(self, name):
+        pass
+
+    def finish(self):
+        pass
+
+
+DISABLED_RUN = _DisabledRun()
+
+
+class PerfRun:
+    enabled = True
+
+    def __init__(self, recorder, total='total'):
+        self.recorder = recorder
+        self.total = total
+        self.spans = {}
+        self.started = time.perf_counter()
+        self._lap = None
+
+    def _add(self, name, seconds):
+        calls, total = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (calls + 1, total + seconds)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def lap(self, name):
+        # Closes the previous section and starts timing the next one
+        now = time.perf_counter()
+        if self._lap is not None:
+            self._add(self._lap[0], now - self._lap[1])
+        self._lap = (name, now)
+
+    def finish(self):
+        self.lap(None)
+        self._lap = None
+        self._add(self.total, time.perf_counter() - self.started)
+        self.recorder.record(self)
+
+
+class PerfRecorder:
+    def __init__(self, window=500, log_lines=False):
+        self.window = window
+        self.log_lines = log_lines
+        self.runs = 0
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._calls = defaultdict(int)
+        self._lock = threading.Lock()
+        if log_lines and not log.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+
+    def start_run(self, enabled, total='total'):
+        # total names the whole-run span: 'total' for a page run, the fragment's name for a fragment
+        return PerfRun(self, total) if enabled else DISABLED_RUN
+
+    def record(self, run):
+        with self._lock:
+            self.runs += 1
+            for name, (calls, seconds) in run.spans.items():
+                self._samples[name].append(seconds)
+                self._calls[name] += calls
+        if self.log_lines:
+            log.info(json.dumps({
+                'event': 'rerun_timing',
+                'run': self.runs,
+                'spans': {name: {'calls': c, 'ms': round(s * 1000, 3)} for name, (c, s) in run.spans.items()},
+            }))
+
+    def summary(self):
+        with self._lock:
+            items = [(name, list(samples), self._calls[name]) for name, samples in self._samples.items()]
+        rows = []
+        for name, samples, calls in items:
+            ms = np.array(samples) * 1000
+            rows.append({
+                'span': name, 'runs': len(ms), 'calls': calls, 'last_ms': ms[-1],
+                'mean_ms': ms.mean(), 'p50_ms': np.percentile(ms, 50),
+                'p95_ms': np.percentile(ms, 95), 'max_ms': ms.max(),
+            })
+        return pd.DataFrame(rows).sort_values('mean_ms', ascending=False) if rows else pd.DataFrame()
+
+    def histogram(self, name, bins=20):
+        with self._lock:
+            ms = np.array(self._samples.get(name, ())) * 1000
+        if not len(ms):
+            return pd.Series(dtype='int64')
+        counts, edges = np.histogram(ms, bins=bins)
+        return pd.Series(counts, index=[f"{lo:.2f}" for lo in edges[:-1]], name='runs')
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._calls.clear()
+            self.runs = 0
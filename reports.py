@@ -0,0 +1,227 @@
+import argparse
+import html
+import importlib.util
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+
+from durations import format_duration
+from forecast import compute_forecast, load_targets
+from paging import filter_rows, get_sorted_rows, sorted_by_date
+from schema import ISSUE_COLUMNS
+
+# --- HEADLESS REPORTS ---
+# Daily, weekly and monthly summaries built from the date-sorted rows of a
+# snapshot (two binary searches per period) and rendered on the server: HTML
+# with an inline SVG chart always, PNG/PDF when matplotlib is installed. The
+# same summary text is used for the WhatsApp share message.
+
+PERIODS = ('day', 'week', 'month')
+FORMATS = ('html', 'png', 'pdf')
+IMAGE_REPORTS_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+
+
+def period_bounds(period, anchor):
+    day = pd.Timestamp(anchor).normalize()
+    if period == 'day':
+        return day, day
+    if period == 'week':
+        start = day - pd.Timedelta(days=day.dayofweek)
+        return start, start + pd.Timedelta(days=6)
+    if period == 'month':
+        start = day.replace(day=1)
+        return start, start + pd.offsets.MonthEnd(0)
+    raise ValueError(f"Unknown report period: {period!r} (expected one of {', '.join(PERIODS)})")
+
+
+def periods_between(period, start, end):
+    """Start dates of every period that overlaps [start, end]."""
+    first, _ = period_bounds(period, start)
+    freq = {'day': 'D', 'week': '7D', 'month': 'MS'}[period]
+    return list(pd.date_range(first, pd.Timestamp(end), freq=freq))
+
+
+class ReportSummary:
+    def __init__(self, period, start, end, totals, daily, issues, ytd_production, forecast=None):
+        self.period = period
+        self.start = start
+        self.end = end
+        self.totals = totals            # Production, Jobs, Trials, DowntimeSec, CleaningSec, Days
+        self.daily = daily              # production per day in the period
+        self.issues = issues            # days logged per issue, most frequent first
+        self.ytd_production = ytd_production
+        self.forecast = forecast        # target tracking as of the period end, when targets are given
+
+    @property
+    def title(self):
+        if self.period == 'day':
+            return f"Daily Report: {self.start:%d %B %Y}"
+        if self.period == 'week':
+            return f"Weekly Report: {self.start:%d %b} - {self.end:%d %b %Y}"
+        return f"Monthly Report: {self.start:%B %Y}"
+
+    def metric_rows(self):
+        t = self.totals
+        average = t['Production'] / t['Days'] if t['Days'] else 0
+        return [
+            ("Production", f"{t['Production']:,.0f} m"),
+            ("Average per recorded day", f"{average:,.0f} m"),
+            ("Jobs", f"{t['Jobs']:,}"),
+            ("Trials", f"{t['Trials']:,}"),
+            ("Issue downtime", format_duration(t['DowntimeSec'])),
+            ("Machine cleaning", format_duration(t['CleaningSec'])),
+            (f"{self.end.year} YTD production", f"{self.ytd_production:,.0f} m"),
+        ] + (self.forecast.metric_rows() if self.forecast else [])
+
+    def text(self):
+        lines = [f"Digital Printing {self.title}", ""]
+        lines += [f"{label}: {value}" for label, value in self.metric_rows()]
+        if len(self.issues):
+            top = ", ".join(f"{name} ({count})" for name, count in self.issues.head(3).items())
+            lines += ["", f"Top issues: {top}"]
+        return "\n".join(lines)
+
+
+def _total(rows, col):
+    if col not in rows.columns:
+        return 0
+    return int(pd.to_numeric(rows[col], errors='coerce').fillna(0).sum())
+
+
+def summarize(sorted_rows, period, anchor, targets=None):
+    start, end = period_bounds(period, anchor)
+    rows = filter_rows(sorted_rows, start, end)
+    totals = {
+        'Production': _total(rows, 'DailyProductionTotal'),
+        'Jobs': _total(rows, 'NoOfJobs'),
+        'Trials': _total(rows, 'NoOfTrials'),
+        'DowntimeSec': _total(rows, 'IssueResolutionTotal_Sec'),
+        'CleaningSec': _total(rows, 'CleanMachineTotal_Sec'),
+        'Days': int(rows['ProductionDate_Parsed'].dt.normalize().nunique()),
+    }
+    production = pd.to_numeric(rows['DailyProductionTotal'], errors='coerce').fillna(0)
+    daily = production.groupby(rows['ProductionDate_Parsed'].dt.normalize()).sum()
+    daily = daily.reindex(pd.date_range(start, end, freq='D'), fill_value=0)
+    cols = [c for c in ISSUE_COLUMNS if c in rows.columns]
+    issues = pd.Series(rows[cols].to_numpy().ravel(), dtype=object).value_counts() if cols else pd.Series(dtype='int64')
+    issues = issues.drop(['NoIssue', ''], errors='ignore')
+    year_rows = filter_rows(sorted_rows, end.replace(month=1, day=1), end)
+    forecast = None
+    if targets is not None:
+        year_daily = pd.to_numeric(year_rows['DailyProductionTotal'], errors='coerce').fillna(0)
+        year_daily = year_daily.groupby(year_rows['ProductionDate_Parsed'].dt.normalize()).sum()
+        # A period that is still running is forecast as of today, like the dashboard
+        forecast = compute_forecast(year_daily, end.year, targets, as_of=min(end.date(), date.today()))
+    return ReportSummary(period, start, end, totals, daily, issues, _total(year_rows, 'DailyProductionTotal'), forecast)
+
+
+def get_report_summary(snapshot, period, anchor, targets=None):
+    start, end = period_bounds(period, anchor)
+    # Keyed by the target values and forecast date, like get_forecast, so reports never lag the dashboard
+    targets_key = (targets.key(end.year), min(end.date(), date.today())) if targets is not None else None
+    return snapshot.memo(('report', period, start, targets_key),
+                         lambda: summarize(get_sorted_rows(snapshot), period, anchor, targets))
+
+
+# --- RENDERERS ---
+def _svg_bars(series, width=640, height=180):
+    peak = max(float(series.max()), 1.0) if len(series) else 1.0
+    step = width / max(len(series), 1)
+    bars = []
+    for i, (day, value) in enumerate(series.items()):
+        h = value / peak * (height - 20)
+        bars.append(f'<rect x="{i * step + 1:.1f}" y="{height - h:.1f}" width="{max(step - 2, 1):.1f}" '
+                    f'height="{h:.1f}" fill="#0083B8"><title>{day:%d %b}: {value:,.0f}</title></rect>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}">{"".join(bars)}</svg>')
+
+
+def render_html(summary):
+    metrics = "".join(f"<tr><th>{html.escape(k)}</th><td>{html.escape(v)}</td></tr>" for k, v in summary.metric_rows())
+    issues = "".join(f"<tr><td>{html.escape(str(k))}</td><td>{v}</td></tr>" for k, v in summary.issues.head(10).items())
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(summary.title)}</title>
+<style>body{{font-family:sans-serif;max-width:680px;margin:24px auto;color:#222}}
+table{{border-collapse:collapse;margin-bottom:16px}}th,td{{text-align:left;padding:4px 12px;border-bottom:1px solid #ddd}}</style>
+</head><body>
+<h1>{html.escape(summary.title)}</h1>
+<p>{summary.start:%d %b %Y} - {summary.end:%d %b %Y} · generated {datetime.now():%d %b %Y %H:%M}</p>
+<table>{metrics}</table>
+<h2>Daily production</h2>
+{_svg_bars(summary.daily)}
+<h2>Issues</h2>
+<table>{issues or '<tr><td>No issues recorded</td></tr>'}</table>
+</body></html>
+"""
+
+
+def render_figure(summary, fmt):
+    # PNG/PDF need matplotlib, which the dashboard itself does not
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise RuntimeError(f"{fmt.upper()} reports need matplotlib; HTML is always available")
+    fig, (text_ax, chart_ax, issue_ax) = plt.subplots(3, 1, figsize=(8.27, 11.69),
+                                                      gridspec_kw={'height_ratios': [1.2, 1, 1]})
+    text_ax.axis('off')
+    text_ax.set_title(summary.title, loc='left', fontsize=16)
+    text_ax.table(cellText=[list(r) for r in summary.metric_rows()], loc='upper left', cellLoc='left', edges='horizontal')
+    chart_ax.bar(summary.daily.index, summary.daily.to_numpy(), color='#0083B8')
+    chart_ax.set_title("Daily production (m)", loc='left')
+    top = summary.issues.head(10)[::-1]
+    issue_ax.barh([str(k)[:40] for k in top.index], top.to_numpy(), color='#E74C3C')
+    issue_ax.set_title("Issues (days logged)", loc='left')
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def render(summary, fmt):
+    if fmt == 'html':
+        return render_html(summary).encode('utf-8')
+    if fmt in ('png', 'pdf'):
+        return render_figure(summary, fmt)
+    raise ValueError(f"Unknown report format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+
+
+def _render_to_file(job):
+    summary, fmt, path = job
+    with open(path, 'wb') as f:
+        f.write(render(summary, fmt))
+    return path
+
+
+def render_batch(summaries, formats, out_dir, workers=None):
+    """Render every summary in every format to out_dir in a process pool; returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(s, fmt, os.path.join(out_dir, f"{s.period}_{s.start:%Y-%m-%d}.{fmt}")) for s in summaries for fmt in formats]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_to_file, jobs))
+
+
+if __name__ == '__main__':
+    from schema import prepare_frame
+    from storage import open_backend
+
+    parser = argparse.ArgumentParser(description="Render production reports for every period in a date range.")
+    parser.add_argument('--period', choices=PERIODS, default='month')
+    parser.add_argument('--start', required=True)
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['html'])
+    parser.add_argument('--out', default='reports')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    rows = sorted_by_date(prepare_frame(open_backend().read()))
+    targets = load_targets()
+    summaries = [summarize(rows, args.period, anchor, targets)
+                 for anchor in periods_between(args.period, args.start, args.end)]
+    paths = render_batch(summaries, args.formats, args.out, args.workers)
+    print(f"Wrote {len(paths)} files to {args.out}")
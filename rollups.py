@@ -0,0 +1,159 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from sheets_io import KEY_COLUMN, DuplicateRowError, RowDiff, frame_rows, key_rows, row_token, row_tokens
+
+# --- RUNNING TOTALS ---
+# Week-, month- and year-to-date totals stored on every row. A running total
+# only depends on earlier rows of the same week/month/year, so a change on day
+# d is repaired by recomputing d's partitions and rewriting rows dated >= d.
+
+ROLLUP_COLUMNS = {
+    'WeeklyProductionTotal': ('DailyProductionTotal', 'W'),
+    'MonthlyProductionTotal': ('DailyProductionTotal', 'M'),
+    'YearlyProductionTotal': ('DailyProductionTotal', 'Y'),
+    'YTD_Jobs_Total': ('NoOfJobs', 'Y'),
+}
+
+
+def _dates(values):
+    return pd.to_datetime(pd.Series(values, dtype=object), errors='coerce')
+
+
+def _partition(dates, freq):
+    # Integer period ordinals; grouping on Period objects would box every row
+    return dates.dt.to_period(freq).array.asi8
+
+
+def scope_mask(dates, touched):
+    """Rows needed to recompute the partitions of the touched dates: their years plus their weeks."""
+    dates = pd.Series(dates)
+    touched = _dates(list(touched)).dropna()
+    return (np.isin(_partition(dates, 'Y'), _partition(touched, 'Y'))
+            | np.isin(_partition(dates, 'W'), _partition(touched, 'W')))
+
+
+def compute_rollups(frame):
+    """Running totals for every dated row of frame, ordered by date; undated rows are left out."""
+    dates = _dates(frame[KEY_COLUMN].to_numpy())
+    dates.index = frame.index
+    dated = dates.dropna().sort_values(kind='stable')
+    result = pd.DataFrame(index=dated.index)
+    for col, (source, freq) in ROLLUP_COLUMNS.items():
+        values = pd.to_numeric(frame.loc[dated.index, source], errors='coerce').fillna(0).astype('int64')
+        result[col] = values.groupby(_partition(dated, freq)).cumsum()
+    return result.reindex(frame.index[dates.notna()])
+
+
+def with_rollups(frame, touched=None):
+    """Copy of frame with running totals recomputed.
+
+    With touched dates, only rows in those dates' partitions and dated on or
+    after the earliest touched date of each partition are rewritten.
+    """
+    out = frame.copy()
+    for col in ROLLUP_COLUMNS:
+        # Sheet frames may hold these as strings; the totals are written back as ints
+        out[col] = out[col].astype(object) if col in out.columns else 0
+    dates = _dates(out[KEY_COLUMN].to_numpy())
+    dates.index = out.index
+    if touched is None:
+        sums = compute_rollups(out)
+        for col in ROLLUP_COLUMNS:
+            out.loc[sums.index, col] = sums[col]
+        return out
+
+    touched = _dates(list(touched)).dropna()
+    scope = scope_mask(dates, touched)
+    sums = compute_rollups(out[scope])
+    days = dates[sums.index]
+    for col, (_source, freq) in ROLLUP_COLUMNS.items():
+        first_touch = touched.groupby(_partition(touched, freq)).min()
+        since = pd.Series(_partition(days, freq), index=days.index).map(first_touch)
+        rewrite = (days >= since).to_numpy()
+        out.loc[sums.index[rewrite], col] = sums.loc[rewrite, col]
+    return out
+
+
+def rollup_diff(before, after, header):
+    """Updates for rows whose running totals differ between two aligned sheet frames.
+
+    Each update carries the version token of its row in before, so a row that
+    someone else edited in the meantime raises ConflictError instead of being
+    overwritten with before's other cells.
+    """
+    changed = np.zeros(len(before), dtype=bool)
+    for col in ROLLUP_COLUMNS:
+        old = pd.to_numeric(before[col], errors='coerce').fillna(0).to_numpy()
+        new = pd.to_numeric(after[col], errors='coerce').fillna(0).to_numpy()
+        changed |= old != new
+    if not changed.any():
+        return RowDiff(pd.DataFrame(columns=header), pd.DataFrame(columns=header), [])
+    base = row_tokens(key_rows(before[changed], header), header)
+    return RowDiff(pd.DataFrame(columns=header), key_rows(after[changed], header), [], base)
+
+
+def rollup_insert(current, new_rows, header):
+    """Fill the running totals of new_rows; returns (new_rows, RowDiff for later rows that shift)."""
+    combined = pd.concat([current, new_rows.reindex(columns=current.columns)], ignore_index=True)
+    rolled = with_rollups(combined, new_rows[KEY_COLUMN])
+    filled = new_rows.copy()
+    for col in ROLLUP_COLUMNS:
+        filled[col] = rolled[col].iloc[len(current):].to_numpy()
+    ripple = rollup_diff(combined.iloc[:len(current)], rolled.iloc[:len(current)], header)
+    return filled, ripple
+
+
+def push_with_rollups(backend, rows, header):
+    """Store new rows with running totals taken from the stored rows at write time.
+
+    The journal's sync worker pushes through this, so totals include every row
+    synced before, and later rows whose totals shift go in the same apply.
+    A row already stored with the same content (an earlier attempt landed) is
+    skipped; a different stored row for the same date raises DuplicateRowError.
+    Returns the RowDiff written, or None if there was nothing new.
+    """
+    new = key_rows(rows, header)
+    if new.empty:
+        return None
+    days = pd.to_datetime(pd.Series(list(new.index), dtype=object))
+    first, last = days.min(), days.max()
+    # The years and weeks of the new rows: everything their totals depend on or shift
+    start = min(first.replace(month=1, day=1), first.to_period('W').start_time)
+    end = max(last.replace(month=12, day=31), last.to_period('W').end_time.normalize())
+    current = backend.query_range(start, end).fillna('')
+    current.columns = [c.strip() for c in current.columns]
+    current = current.reindex(columns=header)
+    stored = frame_rows(current, header, new.index)
+    clash = [k for k in new.index if k in stored and row_token(stored[k], header) != row_token(new.loc[k], header)]
+    if clash:
+        raise DuplicateRowError(f"Another entry for {', '.join(map(str, clash))} was saved in the meantime")
+    new = new[~new.index.isin(list(stored))]
+    if new.empty:
+        return None
+    filled, ripple = rollup_insert(current, new, header)
+    diff = RowDiff(filled, ripple.updates, [], ripple.base)
+    backend.apply(diff, header)
+    return diff
+
+
+if __name__ == '__main__':
+    from storage import open_backend
+
+    parser = argparse.ArgumentParser(description="Recompute every running total and write the fixes in one batch.")
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    backend = open_backend()
+    current = backend.read().fillna('')
+    current.columns = [c.strip() for c in current.columns]
+    header = list(current.columns)
+    rolled = with_rollups(current)
+    # Frozen years stay as archived; weeks that straddle New Year still see their rows
+    live = ~_dates(current[KEY_COLUMN].to_numpy()).dt.year.isin(backend.locked_years()).to_numpy()
+    diff = rollup_diff(current[live], rolled[live], header)
+    print(f"{len(diff.updates)} of {int(live.sum())} live rows need new running totals")
+    if diff and not args.dry_run:
+        backend.apply(diff, header)
+        print("Written in one batch.")
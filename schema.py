@@ -0,0 +1,139 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from durations import DURATION_COLUMNS, seconds_column, add_duration_seconds
+
+# --- PRODUCTION TABLE SCHEMA ---
+ALL_COLUMNS = [
+    'ProductionDate', 'NoOfJobs', 'NoOfTrials', 'DailyProductionTotal',
+    'WeeklyProductionTotal', 'MonthlyProductionTotal', 'YearlyProductionTotal',
+    'YTD_Jobs_Total', 'CleanMachineAm', 'CleanMachinePm', 'CleanMachineTotal',
+    'IssueResolutionTotal', 'ProductionIssues_1', 'ProductionIssues_2',
+    'ProductionIssues_3', 'ProductionIssues_4', 'ProductionIssues_5',
+    'ProductionIssues_6', 'ProductionIssues_7', 'ProductionIssues_8',
+    'ProductionIssues_9', 'ProductionIssues_10',
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
+    'TempDate'
+]
+
+ISSUE_CATEGORIES = ['NoIssue', 'Adjust voltage', 'Admin/Meeting', 'Air pipe burst', 'Arrived at work late',
+    'Barcode scans (break into prod to do scan)', 'Centre a/w on web (moved as speed changed)',
+    'Change degassing unit', 'Check multiple jobs for colour', 'Clean Heads am/pm (1 hr 30 min)',
+    'Clean rollers (extensive clean)', 'Corona issues', 
+    'Defective laminate causes infeed height to trigger', 'Fire drill',
+    'Flush heads, Fill_Cleaner, Print, Refill_Ink', 'Flush printer and replace heads',
+    'General: Smudging/puddling etc.', 'Generator (big) no compressed air', 'HMI not responding',
+    'Infeed trigger due to encoder', 'Ink (G2 vs G4): rework colours', 'Ink management system error',
+    'Left work early', 'Lines: 100 black head', 'Lines: 100 cyan head', 'Lines: 100 magenta head',
+    'Lines: 100 yellow head', 'Lines: 200 black head', 'Lines: 200 cyan head', 'Lines: 200 magenta head',
+    'Lines: 200 yellow head', 'Lines: Print incorrect direction + rewind', 'Manifold card out for repair',
+    'Material change', 'Material change ABL White to ABL Silver', 'Material change ABL to PBL', 
+    'Material change PBL to ABL', 'Meeting', 'PUBLIC HOLIDAY', 'Pack trials', 'Planned Maintenance',
+    'Print slowly due to banding', 'Print trial rolls for varnish/foil', 
+    'Printing on hold due to backlog on SAESA', 
+    'Registration issues (profile auto changed in run)', 'Rollers bouncing', 
+    'Set up multiple trials for trial run', 'Software issue relating to heads',
+    'Spring loose next to encoder', 'Stitch print heads', 
+    'TeaAndLunchBreaks_Ashley not a work', 'TeaAndLunchBreaks_Zahyaan not at work',
+    'Training', 'Trial options for Client meeting', 'Trials: 1 hr', 'Trials: 2 hr', 'Trials: 3 hr', 
+    'Trials: 4 hr', 'Trials: 5 hr', 'Trials: 6 hr', 'Trials: 8 hr', 'Trials: 9 hr', 
+    'Troubleshoot issues with yellow print heads', 'UV lamp issues', 
+    'Vertical white, unprinted bands in yellow heads', 'Web tension error (rollers clamping)',
+    'Worked in another day in lieu of Public Holiday',]
+
+# Columns added at load time; never written back to the sheet
+DERIVED_COLUMNS = ['ProductionDate_Parsed'] + [seconds_column(c) for c in DURATION_COLUMNS]
+
+ISSUE_COLUMNS = [f'ProductionIssues_{i}' for i in range(1, 11)]
+DAY_COLUMNS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Explicit in-memory dtypes; values that do not fit are widened, never truncated
+INT_DTYPES = {
+    'NoOfJobs': 'int16',
+    'NoOfTrials': 'int16',
+    'DailyProductionTotal': 'int32',
+    'WeeklyProductionTotal': 'int32',
+    'MonthlyProductionTotal': 'int32',
+    'YearlyProductionTotal': 'int32',
+    'YTD_Jobs_Total': 'int32',
+}
+SECONDS_DTYPE = 'int32'
+
+log = logging.getLogger(__name__)
+
+
+def _fit_int(values, dtype):
+    numbers = pd.to_numeric(values, errors='coerce')
+    missed = numbers.isna() & values.notna()
+    if missed.any():
+        # Formatted sheet values carry thousands separators ("38,600")
+        numbers[missed] = pd.to_numeric(values[missed].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    values = numbers.fillna(0).round()
+    info = np.iinfo(dtype)
+    if len(values) and (values.max() > info.max or values.min() < info.min):
+        dtype = 'int64'
+    return values.astype(dtype)
+
+
+def issue_dtype(observed=()):
+    # One categorical shared by all ProductionIssues_N columns. Values outside
+    # ISSUE_CATEGORIES (older free-text entries) are kept as extra categories.
+    known = set(ISSUE_CATEGORIES)
+    extra = sorted({v for v in observed if isinstance(v, str) and v and v not in known})
+    return pd.CategoricalDtype(ISSUE_CATEGORIES + extra)
+
+
+def normalize_frame(data):
+    """Coerce a raw sheet frame to the compact schema in place; returns a memory report."""
+    before = int(data.memory_usage(deep=True).sum())
+
+    data['ProductionDate_Parsed'] = pd.to_datetime(data['ProductionDate'], errors='coerce')
+    data.attrs['malformed_durations'] = add_duration_seconds(data)
+    for col in DURATION_COLUMNS:
+        if col in data.columns:
+            data[seconds_column(col)] = _fit_int(data[seconds_column(col)], SECONDS_DTYPE)
+            data[col] = data[col].fillna('').astype(str).astype('category')
+
+    for col, dtype in INT_DTYPES.items():
+        if col in data.columns:
+            data[col] = _fit_int(data[col], dtype)
+    for col in DAY_COLUMNS:
+        if col in data.columns:
+            data[col] = (pd.to_numeric(data[col], errors='coerce').fillna(0) > 0).astype('uint8')
+
+    issue_cols = [c for c in ISSUE_COLUMNS if c in data.columns]
+    if issue_cols:
+        observed = pd.unique(data[issue_cols].to_numpy().ravel())
+        shared = issue_dtype(observed)
+        for col in issue_cols:
+            data[col] = data[col].where(data[col].notna() & (data[col] != ''), 'NoIssue').astype(shared)
+
+    after = int(data.memory_usage(deep=True).sum())
+    report = {'rows': len(data), 'bytes_before': before, 'bytes_after': after}
+    data.attrs['memory_report'] = report
+    log.info("Normalized %d rows: %.1f KiB -> %.1f KiB", len(data), before / 1024, after / 1024)
+    return report
+
+
+def prepare_frame(data):
+    """Loader output -> snapshot frame: trimmed headers, normalized in place."""
+    if data.empty:
+        return pd.DataFrame(columns=ALL_COLUMNS + DERIVED_COLUMNS)
+    data.columns = [c.strip() for c in data.columns]
+    normalize_frame(data)
+    return data
+
+
+def to_sheet_frame(df):
+    """Inverse of normalize_frame for writing: sheet columns only, plain values."""
+    frame = df.drop(columns=DERIVED_COLUMNS, errors='ignore').copy()
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype(object)
+    for col in DAY_COLUMNS:
+        if col in frame.columns:
+            # The sheet stores the weekday flag as 1 and leaves other days blank
+            frame[col] = frame[col].astype(object).where(frame[col] == 1, '')
+    return frame.fillna('')
@@ -0,0 +1,342 @@
+import csv
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- INCREMENTAL GOOGLE SHEETS WRITES ---
+# conn.update() clears the worksheet and rewrites every row. The helpers below
+# go through the gspread client that st-gsheets-connection already holds so a
+# save only touches the rows that changed.
+
+KEY_COLUMN = 'ProductionDate'
+
+_worksheets = {}
+
+
+class SheetWriteUnavailable(Exception):
+    """The connection has no write-capable gspread client (e.g. public URL mode)."""
+
+
+class DuplicateRowError(Exception):
+    pass
+
+
+class InvalidRowError(ValueError):
+    """Rows that can never be written as given: a missing, unreadable or repeated date."""
+
+
+def open_worksheet(conn, spreadsheet, worksheet):
+    client = getattr(getattr(conn, 'client', None), '_client', None)
+    if client is None or not hasattr(client, 'open_by_url'):
+        raise SheetWriteUnavailable("Service account connection required for row-level writes")
+    cache_key = (id(client), spreadsheet, worksheet)
+    if cache_key not in _worksheets:
+        _worksheets[cache_key] = client.open_by_url(spreadsheet).worksheet(worksheet)
+    return _worksheets[cache_key]
+
+
+def to_cell(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA or value is pd.NaT:
+        return ""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def to_rows(df, header):
+    frame = df.reindex(columns=header)
+    return [[to_cell(v) for v in row] for row in frame.itertuples(index=False, name=None)]
+
+
+def parse_keys(values):
+    return set(pd.to_datetime(pd.Series(values, dtype=object), errors='coerce').dropna().dt.date)
+
+
+# --- KEYED ROW DIFF (EDIT PATH) ---
+class LockedRowError(Exception):
+    pass
+
+
+class RowDiff:
+    def __init__(self, inserts, updates, deletes, base=None):
+        self.inserts = inserts
+        self.updates = updates
+        self.deletes = deletes
+        # Version token per updated/deleted key: the row as the operator loaded it
+        self.base = base or {}
+
+    def __bool__(self):
+        return bool(len(self.inserts) or len(self.updates) or len(self.deletes))
+
+    def summary(self):
+        return f"{len(self.updates)} updated, {len(self.inserts)} added, {len(self.deletes)} deleted"
+
+
+def _comparable(value):
+    value = to_cell(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+# --- OPTIMISTIC CONCURRENCY ---
+# A save carries a token per row it updates or deletes. Before writing, only
+# those rows are fetched from the live store; a changed token means someone
+# else edited the row since it was loaded. Saves touching other rows merge.
+# Running totals are left out: other writers shift them as a side effect.
+
+RUNNING_TOTAL_COLUMNS = {'WeeklyProductionTotal', 'MonthlyProductionTotal', 'YearlyProductionTotal', 'YTD_Jobs_Total'}
+_TOKEN_SKIP = RUNNING_TOTAL_COLUMNS | {KEY_COLUMN}
+
+
+class ConflictError(Exception):
+    def __init__(self, message, conflicts):
+        super().__init__(message)
+        self.conflicts = conflicts
+
+
+def _token_cell(value):
+    # Sheets and the typed snapshot spell the same value differently
+    # ("38,600" / 38600, "" / 0, "" / NoIssue); compare a canonical form
+    text = _comparable(value)
+    if text == 'NoIssue':
+        return ''
+    try:
+        number = float(text.replace(',', ''))
+    except ValueError:
+        return text
+    return '' if number == 0 else (str(int(number)) if number.is_integer() else str(number))
+
+
+def row_token(values, header):
+    cells = [_token_cell(v) for col, v in zip(header, values) if col not in _TOKEN_SKIP]
+    return hashlib.sha1('\x1f'.join(cells).encode('utf-8')).hexdigest()[:16]
+
+
+def row_tokens(frame, header):
+    """Tokens for a key_rows() frame, keyed like its index."""
+    return {key: row_token(values, header) for key, values in
+            zip(frame.index, frame.reindex(columns=header).itertuples(index=False, name=None))}
+
+
+def frame_rows(frame, header, keys):
+    """Live rows of a full frame for the given keys, as {key: values aligned to header}."""
+    if frame.empty:
+        return {}
+    frame = frame.reindex(columns=header)
+    dates = pd.to_datetime(frame[KEY_COLUMN], errors='coerce').dt.date
+    hit = dates.isin(set(keys)).to_numpy()
+    return {k: list(v) for k, v in zip(dates[hit], frame[hit].itertuples(index=False, name=None))}
+
+
+def find_conflicts(diff, live, header):
+    """Rows of the diff that clash with the live rows ({key: values}); empty if the save can merge."""
+    found = []
+
+    def clash(key, problem, ours=None, theirs=None):
+        if ours is None or theirs is None:
+            found.append((key, '', '', '', problem))
+            return
+        for col, a, b in zip(header, ours, theirs):
+            if col not in _TOKEN_SKIP and _token_cell(a) != _token_cell(b):
+                found.append((key, col, to_cell(a), to_cell(b), problem))
+
+    for key, values in zip(diff.inserts.index, diff.inserts.reindex(columns=header).itertuples(index=False, name=None)):
+        if key in live and row_token(live[key], header) != row_token(values, header):
+            clash(key, "added by someone else", list(values), live[key])
+    for key, values in zip(diff.updates.index, diff.updates.reindex(columns=header).itertuples(index=False, name=None)):
+        if key not in diff.base:
+            continue
+        if key not in live:
+            clash(key, "deleted by someone else")
+        elif row_token(live[key], header) != diff.base[key]:
+            clash(key, "changed by someone else", list(values), live[key])
+    for key in diff.deletes:
+        if key in diff.base and key in live and row_token(live[key], header) != diff.base[key]:
+            clash(key, "changed by someone else before delete")
+    return pd.DataFrame(found, columns=['Date', 'Column', 'Yours', 'Theirs', 'Problem'])
+
+
+def check_conflicts(diff, live, header):
+    conflicts = find_conflicts(diff, live, header)
+    if len(conflicts):
+        dates = ", ".join(str(d) for d in conflicts['Date'].unique())
+        raise ConflictError(f"Someone else saved changes to {dates}; reload and re-apply your edits", conflicts)
+
+
+def key_rows(df, header):
+    frame = df.reindex(columns=header)
+    blank = frame.apply(lambda col: col.map(_comparable)).eq("").all(axis=1)
+    frame = frame[~blank]
+    keys = pd.to_datetime(frame[KEY_COLUMN], errors='coerce')
+    if keys.isna().any():
+        bad = ", ".join(map(str, frame.loc[keys.isna(), KEY_COLUMN].tolist()))
+        raise InvalidRowError(f"Invalid or missing {KEY_COLUMN}: {bad}")
+    frame.index = pd.Index(keys.dt.date, name='key')
+    dupes = frame.index[frame.index.duplicated()].unique()
+    if len(dupes):
+        raise InvalidRowError(f"Duplicate {KEY_COLUMN}: " + ", ".join(map(str, dupes)))
+    return frame
+
+
+def diff_rows(before, after, header, locked_years=()):
+    old = key_rows(before, header)
+    new = key_rows(after, header)
+    common = new.index.intersection(old.index)
+    old_cmp = old.loc[common].apply(lambda col: col.map(_comparable))
+    new_cmp = new.loc[common].apply(lambda col: col.map(_comparable))
+    changed = common[(old_cmp != new_cmp).any(axis=1).to_numpy()]
+
+    deletes = list(old.index.difference(new.index))
+    diff = RowDiff(
+        inserts=new.loc[new.index.difference(old.index)],
+        updates=new.loc[changed],
+        deletes=deletes,
+        base=row_tokens(old.loc[list(changed) + deletes], header),
+    )
+    touched = list(diff.inserts.index) + list(diff.updates.index) + diff.deletes
+    locked = sorted({k for k in touched if k.year in set(locked_years)})
+    if locked:
+        raise LockedRowError("Locked records cannot be modified: " + ", ".join(map(str, locked)))
+    return diff
+
+
+def apply_diff_frame(current, diff, header):
+    """Apply a RowDiff to a whole frame in memory (used by full-rewrite fallbacks)."""
+    frame = current.reindex(columns=header).astype(object)
+    keys = pd.to_datetime(frame[KEY_COLUMN], errors='coerce').dt.date
+    appends = [diff.inserts]
+    for key, row in diff.updates.iterrows():
+        hit = (keys == key).to_numpy()
+        if hit.any():
+            frame.loc[hit, header] = [row[header].tolist()]
+        else:
+            appends.append(diff.updates.loc[[key]])
+    frame = frame[~keys.isin(diff.deletes).to_numpy()]
+    return pd.concat([frame] + appends, ignore_index=True)
+
+
+def _column_letter(n):
+    letters = ''
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _paste(sheet_id, row_index, rows):
+    # pasteData parses each cell like typed input (USER_ENTERED), so dates and
+    # durations are stored the same way whether a row was added or edited
+    text = "\n".join("\t".join(re.sub(r'[\t\r\n]', ' ', str(v)) for v in row) for row in rows)
+    return {'pasteData': {'coordinate': {'sheetId': sheet_id, 'rowIndex': row_index, 'columnIndex': 0},
+                          'data': text, 'type': 'PASTE_NORMAL', 'delimiter': '\t'}}
+
+
+def apply_row_diff(ws, diff, header):
+    """Write a RowDiff as one batchUpdate: updates, then deletes, then appends.
+
+    A batchUpdate is atomic, so a failed save leaves the sheet untouched and
+    the whole diff can simply be retried.
+    """
+    if not diff:
+        return
+    key_idx = header.index(KEY_COLUMN) + 1
+    # Locate rows by key in the live sheet, not by our snapshot's positions
+    key_column = ws.col_values(key_idx)
+    live_keys = pd.to_datetime(pd.Series(key_column[1:], dtype=object), errors='coerce')
+    row_of = {d.date(): i + 2 for i, d in enumerate(live_keys) if not pd.isna(d)}
+    # Fetch just the touched rows that exist live and check their version tokens
+    touched = [k for k in list(diff.inserts.index) + list(diff.updates.index) + list(diff.deletes) if k in row_of]
+    fetched = ws.batch_get([f'{row_of[k]}:{row_of[k]}' for k in touched]) if touched else []
+    live = {}
+    for key, values in zip(touched, fetched):
+        row = list(values[0]) if values else []
+        live[key] = (row + [''] * len(header))[:len(header)]
+    check_conflicts(diff, live, header)
+
+    requests, appends = [], []
+    for key, row in zip(diff.updates.index, to_rows(diff.updates, header)):
+        if key not in row_of:
+            appends.append(row)
+            continue
+        requests.append(_paste(ws.id, row_of[key] - 1, [row]))
+    # Delete bottom-up so earlier row numbers stay valid
+    deleted = sorted((row_of[k] for k in diff.deletes if k in row_of), reverse=True)
+    requests += [{'deleteDimension': {'range': {'sheetId': ws.id, 'dimension': 'ROWS', 'startIndex': r - 1, 'endIndex': r}}}
+                 for r in deleted]
+    # An insert that is already live with the same content was saved by a retry
+    appends += to_rows(diff.inserts[~diff.inserts.index.isin(list(row_of))], header)
+    if appends:
+        # New rows go directly below the last keyed row, pushing any blank grid rows down
+        end = len(key_column) - len(deleted)
+        requests.append({'insertDimension': {'range': {'sheetId': ws.id, 'dimension': 'ROWS',
+                                                       'startIndex': end, 'endIndex': end + len(appends)},
+                                             'inheritFromBefore': end > 0}})
+        requests.append(_paste(ws.id, end, appends))
+    ws.spreadsheet.batch_update({'requests': requests})
+
+
+# --- OFFLINE STAND-IN ---
+class LocalWorksheet:
+    """In-memory (optionally CSV-backed) stand-in for the gspread Worksheet calls used above."""
+
+    def __init__(self, rows=None, path=None):
+        self.id = 0
+        self.title = 'Data'
+        self.path = path
+        if rows is None and path:
+            try:
+                with open(path, newline='') as f:
+                    rows = list(csv.reader(f))
+            except FileNotFoundError:
+                rows = []
+        self.rows = [list(r) for r in (rows or [])]
+
+    @property
+    def spreadsheet(self):
+        return self
+
+    def get_all_values(self):
+        return [list(r) for r in self.rows]
+
+    def col_values(self, col):
+        values = [r[col - 1] if len(r) >= col else "" for r in self.rows]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def batch_get(self, ranges, **kwargs):
+        # Whole-row ranges only: "5:5", "1:1" or "A5:ZZ" (row 5 to the end)
+        result = []
+        for a1 in ranges:
+            start, end = re.fullmatch(r'[A-Z]*(\d+):[A-Z]*(\d*)', a1).groups()
+            stop = int(end) if end else len(self.rows)
+            result.append([list(r) for r in self.rows[int(start) - 1:stop]])
+        return result
+
+    def batch_update(self, body):
+        # The requests apply_row_diff sends, in order
+        for request in body['requests']:
+            kind, spec = next(iter(request.items()))
+            if kind == 'pasteData':
+                start = spec['coordinate']['rowIndex']
+                for n, line in enumerate(spec['data'].split('\n')):
+                    while len(self.rows) <= start + n:
+                        self.rows.append([])
+                    self.rows[start + n] = line.split(spec['delimiter'])
+            elif kind == 'deleteDimension':
+                r = spec['range']
+                del self.rows[r['startIndex']:r['endIndex']]
+            elif kind == 'insertDimension':
+                r = spec['range']
+                self.rows[r['startIndex']:r['startIndex']] = [[] for _ in range(r['endIndex'] - r['startIndex'])]
+        self._save()
+
+    def _save(self):
+        if self.path:
+            with open(self.path, 'w', newline='') as f:
+                csv.writer(f).writerows(self.rows)
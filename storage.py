@@ -0,0 +1,320 @@
+import argparse
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from archive import ArchiveStore
+from config import (STORAGE_BACKEND, LOCAL_DB_PATH, SPREADSHEET_URL, SHEET_NAME, ARCHIVE_DIR, ARCHIVE_ENABLED,
+                    READ_ONLY_YEARS)
+from schema import ALL_COLUMNS
+from sheets_io import (KEY_COLUMN, RowDiff, DuplicateRowError, LockedRowError, SheetWriteUnavailable,
+                       open_worksheet, apply_row_diff, apply_diff_frame, check_conflicts,
+                       frame_rows, key_rows, to_cell)
+
+# --- STORAGE BACKENDS ---
+# The app talks to a StorageBackend instead of st.connection directly.
+# "sheets" is the production Google Sheet; "sqlite" is a local store used to
+# run and benchmark the app offline. Rows are always in the sheet's column
+# layout (raw values); normalize_frame() types them after read.
+
+
+class StorageBackend:
+    name = 'base'
+
+    def read(self):
+        raise NotImplementedError
+
+    def apply(self, diff, header):
+        """Apply the inserts, updates and deletes of a RowDiff as one batch."""
+        raise NotImplementedError
+
+    def upsert(self, rows, header):
+        self.apply(RowDiff(rows.iloc[:0], key_rows(rows, header), []), header)
+
+    def delete(self, keys, header):
+        keys = [pd.Timestamp(k).date() for k in keys]
+        empty = pd.DataFrame(columns=header)
+        self.apply(RowDiff(empty, empty, keys), header)
+
+    def query_range(self, start, end, boundary=None):
+        # Default: filter the live read (everything when there is no archive
+        # boundary). Backends that can filter natively override this.
+        data = self.read_live(boundary)
+        dates = pd.to_datetime(data[KEY_COLUMN], errors='coerce')
+        return data[(dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+
+    def locked_years(self):
+        """Years whose rows cannot be written."""
+        return list(READ_ONLY_YEARS)
+
+    def frozen_years(self):
+        """Years served from immutable archive snapshots; their rows never change again."""
+        return []
+
+    def read_live(self, boundary):
+        """Rows after the archive boundary; may include older rows, which the caller drops."""
+        return self.read()
+
+
+class SheetsBackend(StorageBackend):
+    name = 'sheets'
+
+    def __init__(self, conn, spreadsheet, worksheet):
+        self.conn = conn
+        self.spreadsheet = spreadsheet
+        self.worksheet = worksheet
+
+    def read(self):
+        return self.conn.read(spreadsheet=self.spreadsheet, worksheet=self.worksheet, ttl=0)
+
+    def _ws(self):
+        return open_worksheet(self.conn, self.spreadsheet, self.worksheet)
+
+    def read_live(self, boundary):
+        offset = boundary['offset'] if boundary else 0
+        if not offset:
+            return self.read()
+        try:
+            ws = self._ws()
+        except SheetWriteUnavailable:
+            return self.read()
+        # One request: header, the last archived row (to check the boundary
+        # has not moved) and everything below it, open-ended to the bottom.
+        # Numbers come back raw ("38,600" would not parse); dates and durations as displayed.
+        header, edge, body = ws.batch_get(['1:1', f'{offset + 1}:{offset + 1}', f'A{offset + 2}:ZZ'],
+                                          value_render_option='UNFORMATTED_VALUE',
+                                          date_time_render_option='FORMATTED_STRING')
+        header = [c.strip() for c in header[0]] if header else []
+        edge = list(edge[0]) if edge else []
+        key_idx = header.index(KEY_COLUMN) if KEY_COLUMN in header else None
+        if key_idx is None or key_idx >= len(edge) or edge[key_idx] != boundary['key']:
+            # Rows were inserted or removed above the boundary; fall back to a full read
+            return self.read()
+        width = len(header)
+        return pd.DataFrame([(list(r) + [''] * width)[:width] for r in body], columns=header, dtype=object)
+
+    def _rewrite(self, frame):
+        self.conn.update(spreadsheet=self.spreadsheet, worksheet=self.worksheet, data=frame.fillna(""))
+
+    def apply(self, diff, header):
+        if not diff:
+            return
+        try:
+            apply_row_diff(self._ws(), diff, header)
+        except SheetWriteUnavailable:
+            current = self.read()
+            touched = list(diff.inserts.index) + list(diff.updates.index) + list(diff.deletes)
+            check_conflicts(diff, frame_rows(current, header, touched), header)
+            self._rewrite(apply_diff_frame(current, diff, header))
+
+
+class SQLiteBackend(StorageBackend):
+    name = 'sqlite'
+
+    def __init__(self, path, columns=ALL_COLUMNS, table='production'):
+        self.path = path
+        self.columns = list(columns)
+        self.table = table
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        with self._connect() as db:
+            # Untyped columns keep values exactly as written; key_date is the
+            # ISO date used for uniqueness and range filters.
+            db.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (key_date TEXT UNIQUE, {cols})')
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _select(self, where="", params=()):
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        with self._connect() as db:
+            return pd.read_sql_query(f'SELECT {cols} FROM "{self.table}" {where} ORDER BY rowid', db, params=params)
+
+    def _records(self, rows):
+        frame = rows.reindex(columns=self.columns)
+        keys = pd.to_datetime(frame[KEY_COLUMN], errors='coerce').dt.strftime('%Y-%m-%d')
+        return [
+            (None if pd.isna(k) else k, *[to_cell(v) for v in values])
+            for k, values in zip(keys, frame.itertuples(index=False, name=None))
+        ]
+
+    def read(self):
+        return self._select()
+
+    def append(self, rows):
+        # Bulk load (CSV import, fixtures); the app writes through apply()
+        placeholders = ", ".join("?" * (len(self.columns) + 1))
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        try:
+            with self._connect() as db:
+                db.executemany(f'INSERT INTO "{self.table}" (key_date, {cols}) VALUES ({placeholders})',
+                               self._records(rows))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateRowError(f"Entry already exists: {e}")
+
+    def apply(self, diff, header=None):
+        if not diff:
+            return
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        placeholders = ", ".join("?" * (len(self.columns) + 1))
+        updates = ", ".join(f'"{c}" = excluded."{c}"' for c in self.columns)
+        changed = pd.concat([diff.updates, diff.inserts])
+        touched = list(diff.inserts.index) + list(diff.updates.index) + list(diff.deletes)
+        with self._connect() as db:
+            # Checked and written in one transaction, so no other writer can slip in between
+            db.execute('BEGIN IMMEDIATE')
+            live = pd.read_sql_query(
+                f'SELECT {cols} FROM "{self.table}" WHERE key_date IN ({", ".join("?" * len(touched))})',
+                db, params=[str(k) for k in touched]) if touched else pd.DataFrame(columns=self.columns)
+            check_conflicts(diff, frame_rows(live, self.columns, touched), self.columns)
+            db.executemany(f'DELETE FROM "{self.table}" WHERE key_date = ?',
+                           [(str(k),) for k in diff.deletes])
+            db.executemany(
+                f'INSERT INTO "{self.table}" (key_date, {cols}) VALUES ({placeholders}) '
+                f'ON CONFLICT(key_date) DO UPDATE SET {updates}',
+                self._records(changed))
+
+    def query_range(self, start, end, boundary=None):
+        # Pushed down: served from the UNIQUE index on key_date, so the boundary adds nothing
+        return self._select("WHERE key_date BETWEEN ? AND ?",
+                            (pd.Timestamp(start).strftime('%Y-%m-%d'), pd.Timestamp(end).strftime('%Y-%m-%d')))
+
+    def read_live(self, boundary):
+        if not boundary:
+            return self.read()
+        # Undated rows have a NULL key_date and always belong to the live set
+        return self._select("WHERE key_date IS NULL OR key_date >= ?", (boundary['since'],))
+
+
+def _key_years(keys):
+    return pd.to_datetime(pd.Series(list(keys), dtype=object), errors='coerce').dt.year
+
+
+class PartitionedBackend(StorageBackend):
+    """Frozen closed years from an ArchiveStore plus the live backend for the open year.
+
+    Writes that touch a frozen year raise LockedRowError here, whatever the
+    caller's own checks; reads only fetch the live partition from the source.
+    """
+
+    def __init__(self, live, archive, current_year=None):
+        self.live = live
+        self.archive = archive
+        self.current_year = current_year
+        self.name = live.name
+        self._checked_year = None
+
+    def _year(self):
+        return self.current_year or datetime.now().year
+
+    def locked_years(self):
+        # Archiving only adds to the configured read-only years; it never unlocks one
+        return sorted(set(READ_ONLY_YEARS) | set(self.archive.frozen_years()))
+
+    def frozen_years(self):
+        return self.archive.frozen_years()
+
+    def freeze_closed_years(self, full=None):
+        """Freeze every year before the current one that has rows and is not frozen yet."""
+        full = self.live.read() if full is None else full
+        if full.empty:
+            return []
+        full = full.rename(columns=lambda c: c.strip())
+        years = _key_years(full[KEY_COLUMN]).to_numpy()
+        frozen = set(self.frozen_years())
+        new = sorted({int(y) for y in years[~pd.isna(years)] if y < self._year() and int(y) not in frozen})
+        for year in new:
+            self.archive.freeze(year, full[years == year])
+        if new or not self.archive.boundary:
+            # The live read skips the leading run of archived rows
+            archived = pd.Series(years).isin(self.frozen_years()).to_numpy()
+            offset = len(archived) if archived.all() else int(archived.argmin())
+            key = str(full[KEY_COLUMN].iloc[offset - 1]) if offset else ''
+            self.archive.set_boundary(offset, key, f"{self._year()}-01-01")
+        return new
+
+    def read(self):
+        if self._checked_year != self._year():
+            # Once per process (and per new year): archive any year that has closed
+            full = self.live.read()
+            self.freeze_closed_years(full)
+            self._checked_year = self._year()
+            live = full
+        else:
+            live = self.live.read_live(self.archive.boundary)
+        frozen = self.archive.load_all()
+        if live.empty:
+            return frozen
+        live = live.rename(columns=lambda c: c.strip())
+        stale = _key_years(live[KEY_COLUMN]).isin(self.frozen_years()).to_numpy()
+        # Rows dated in a frozen year are served from the archive, never the source
+        return pd.concat([frozen, live[~stale]], ignore_index=True) if len(frozen) else live[~stale]
+
+    def _check(self, keys):
+        locked = set(self.locked_years())
+        years = _key_years(keys)
+        hit = sorted({str(k) for k, y in zip(keys, years) if y in locked})
+        if hit:
+            raise LockedRowError("Archived years are read-only: " + ", ".join(hit))
+
+    def apply(self, diff, header):
+        self._check(list(diff.inserts.index) + list(diff.updates.index) + list(diff.deletes))
+        self.live.apply(diff, header)
+
+    def query_range(self, start, end):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        frozen_years = self.frozen_years()
+        last_frozen = frozen_years[-1] if frozen_years else None
+        parts = []
+        if last_frozen is not None and start.year <= last_frozen:
+            # The archived part never touches the source
+            frozen = self.archive.load_all()
+            dates = pd.to_datetime(frozen[KEY_COLUMN], errors='coerce')
+            parts.append(frozen[(dates >= start) & (dates <= end)])
+        if last_frozen is None or end.year > last_frozen:
+            # The rest goes to the live backend: SQLite filters by key_date, Sheets
+            # reads only the rows below the archive boundary
+            since = start if last_frozen is None else max(start, pd.Timestamp(last_frozen + 1, 1, 1))
+            live = self.live.query_range(since, end, self.archive.boundary)
+            parts.append(live.rename(columns=lambda c: c.strip()))
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+def make_backend(kind=STORAGE_BACKEND, conn=None, archive=ARCHIVE_ENABLED):
+    if kind == 'sheets':
+        if conn is None:
+            raise ValueError("The sheets backend needs a GSheetsConnection")
+        backend = SheetsBackend(conn, SPREADSHEET_URL, SHEET_NAME)
+    elif kind == 'sqlite':
+        backend = SQLiteBackend(LOCAL_DB_PATH)
+    else:
+        raise ValueError(f"Unknown storage backend: {kind!r} (expected 'sheets' or 'sqlite')")
+    return PartitionedBackend(backend, ArchiveStore(ARCHIVE_DIR)) if archive else backend
+
+
+def open_backend(kind=STORAGE_BACKEND, archive=ARCHIVE_ENABLED):
+    # For command-line tools: opens the Sheets connection outside a page script
+    conn = None
+    if kind == 'sheets':
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+        conn = st.connection("gsheets", type=GSheetsConnection)
+    return make_backend(kind, conn=conn, archive=archive)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load a CSV export of the production sheet into the local SQLite store.")
+    parser.add_argument('csv_path')
+    parser.add_argument('--db', default=LOCAL_DB_PATH)
+    args = parser.parse_args()
+    rows = pd.read_csv(args.csv_path, dtype=str, keep_default_na=False)
+    rows.columns = [c.strip() for c in rows.columns]
+    SQLiteBackend(args.db).append(rows)
+    print(f"Imported {len(rows)} rows into {args.db}")
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# The app modules are flat scripts at the repo root, imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+
+class SheetConnection:
+    """Just enough of GSheetsConnection for SheetsBackend over a LocalWorksheet."""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.client = SimpleNamespace(_client=self)
+        self.full_reads = 0
+
+    def open_by_url(self, url):
+        return SimpleNamespace(worksheet=lambda name: self.sheet)
+
+    def read(self, **kwargs):
+        self.full_reads += 1
+        rows = self.sheet.get_all_values()
+        return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+@pytest.fixture
+def sheets_backend(tmp_path):
+    """make(sheet) -> SheetsBackend writing to that LocalWorksheet."""
+    from storage import SheetsBackend
+
+    def make(sheet):
+        # The worksheet cache is keyed by URL, so each backend gets its own
+        return SheetsBackend(SheetConnection(sheet), str(tmp_path / f'sheet-{id(sheet)}'), 'Data')
+    return make
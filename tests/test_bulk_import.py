@@ -0,0 +1,110 @@
+import io
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from bulk_import import plan_import, read_table, validate_import
+from rollups import ROLLUP_COLUMNS, push_with_rollups, with_rollups
+from schema import ALL_COLUMNS
+from sheets_io import DuplicateRowError
+from storage import SQLiteBackend
+
+CSV = """ProductionDate,DailyProductionTotal,NoOfJobs,IssueResolutionTotal,ProductionIssues_1,Shift
+2026-03-09,40000,5,0:30:00,air pipe burst,A
+2026-03-10,-5,5,0:30:00,,A
+2026-03-11,41000,6,soon,,B
+2026-03-11,42000,6,0:10:00,,B
+not a date,1,1,,,A
+2026-03-02,39000,4,,,A
+2025-12-01,39000,4,,,A
+2026-03-12,43000,7,,Gremlins,A
+2026-03-13,44000,8,1:00:00,,A
+"""
+
+
+def report_for(csv=CSV):
+    return validate_import(read_table(io.StringIO(csv), 'upload.csv'), existing_dates={date(2026, 3, 2)},
+                           locked_years=[2025])
+
+
+def test_every_problem_is_reported_per_row_and_column():
+    report = report_for()
+    problems = {(row, col, problem) for row, col, problem in report.errors[['Row', 'Column', 'Problem']].itertuples(index=False)}
+    assert problems == {
+        (2, 'DailyProductionTotal', 'not a non-negative number'),
+        (3, 'IssueResolutionTotal', 'unreadable duration'),
+        (3, 'ProductionDate', 'repeated in this file'),
+        (4, 'ProductionDate', 'repeated in this file'),
+        (5, 'ProductionDate', 'not a date'),
+        (6, 'ProductionDate', 'already entered'),
+        (7, 'ProductionDate', 'year is read-only'),
+        (8, 'ProductionIssues_1', 'unknown issue'),
+    }
+    assert report.unknown_columns == ['Shift']
+    assert list(report.valid['ProductionDate']) == ['03/09/2026', '03/13/2026']
+
+
+def test_valid_rows_are_normalized_to_the_sheet_layout():
+    valid = report_for().valid
+    first = valid.iloc[0]
+    assert list(valid.columns) == ALL_COLUMNS
+    assert first['ProductionIssues_1'] == 'Air pipe burst'
+    assert first['ProductionIssues_2'] == 'NoIssue'
+    assert first['TempDate'] == '2026-03-09' and first['Monday'] == '1' and first['Tuesday'] == ''
+
+
+def stored_rows():
+    current = pd.DataFrame({c: '' for c in ALL_COLUMNS}, index=range(3))
+    current['ProductionDate'] = ['03/02/2026', '03/10/2026', '03/16/2026']
+    current['DailyProductionTotal'] = ['39000', '10000', '20000']
+    current['NoOfJobs'] = ['4', '1', '2']
+    return with_rollups(current)
+
+
+def test_plan_fills_totals_and_ripples_later_rows_with_their_tokens():
+    current = stored_rows()
+    report = report_for()
+    diff = plan_import(report, current, ALL_COLUMNS)
+    assert list(diff.inserts.index) == [date(2026, 3, 9), date(2026, 3, 13)]
+    assert list(diff.updates.index) == [date(2026, 3, 10), date(2026, 3, 16)]
+    assert set(diff.base) == set(diff.updates.index)
+    assert '2 existing rows get new running totals' in report.summary()
+
+    combined = pd.concat([current, report.valid], ignore_index=True)
+    expected = with_rollups(combined).set_index('ProductionDate')[list(ROLLUP_COLUMNS)].astype('int64')
+    planned = pd.concat([diff.inserts, diff.updates]).set_index('ProductionDate')[list(ROLLUP_COLUMNS)].astype('int64')
+    pd.testing.assert_frame_equal(planned, expected.loc[planned.index])
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'production.sqlite3'))
+    backend.append(stored_rows())
+    return backend
+
+
+def totals(rows):
+    return rows.set_index('ProductionDate')[list(ROLLUP_COLUMNS)].astype('int64').sort_index()
+
+
+def test_the_import_write_takes_totals_from_storage_not_the_preview(backend):
+    report = report_for()
+    plan_import(report, stored_rows(), ALL_COLUMNS)     # preview against a snapshot
+    # Another operator's entry lands between the preview and the Import click
+    push_with_rollups(backend, generate_production_table(1, start='2026-03-11'), ALL_COLUMNS)
+
+    written = push_with_rollups(backend, report.valid, ALL_COLUMNS)
+    assert list(written.inserts.index) == [date(2026, 3, 9), date(2026, 3, 13)]
+    stored = backend.read()
+    assert len(stored) == 6
+    pd.testing.assert_frame_equal(totals(stored), totals(with_rollups(stored)))
+
+
+def test_a_date_stored_after_the_preview_refuses_the_import(backend):
+    report = report_for()
+    push_with_rollups(backend, generate_production_table(1, start='2026-03-13'), ALL_COLUMNS)
+    with pytest.raises(DuplicateRowError):
+        push_with_rollups(backend, report.valid, ALL_COLUMNS)
+    assert len(backend.read()) == 4
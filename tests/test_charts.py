@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from charts import chart_series, lttb, production_series
+from schema import prepare_frame
+
+
+@pytest.mark.parametrize('n, threshold', [(10, 10), (10, 50), (10, 2), (0, 5)])
+def test_short_series_are_kept_whole(n, threshold):
+    assert lttb(np.arange(n), np.arange(n), threshold).tolist() == list(range(n))
+
+
+def test_downsampling_keeps_the_ends_and_stays_ordered():
+    x = np.arange(1000)
+    y = np.sin(x / 20.0)
+    keep = lttb(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+
+
+def test_downsampling_keeps_a_spike():
+    y = np.zeros(1000)
+    y[437] = 50_000
+    assert 437 in lttb(np.arange(1000), y, 50)
+
+
+def test_chart_series_is_capped_at_max_points():
+    df = prepare_frame(generate_production_table(3000, start='2020-01-01'))
+    full = production_series(df)
+    series = chart_series(df, max_points=500)
+    assert len(full) > 500 and len(series) == 500
+    assert series.index[0] == full.index[0] and series.index[-1] == full.index[-1]
+    assert series.max() == full.max()
+
+
+def test_rollups_sum_per_period():
+    df = prepare_frame(generate_production_table(60, start='2026-01-01'))      # to 03/01
+    monthly = chart_series(df, 2026, 'Month')
+    daily = production_series(df, 2026)
+    assert list(monthly.index) == list(pd.date_range('2026-01-01', periods=3, freq='MS'))
+    assert monthly.sum() == daily.sum()
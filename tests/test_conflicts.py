@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from schema import ALL_COLUMNS
+from sheets_io import (ConflictError, LocalWorksheet, RowDiff, apply_row_diff, diff_rows, find_conflicts,
+                       key_rows, row_token)
+from storage import SQLiteBackend
+
+
+@pytest.fixture
+def loaded():
+    return generate_production_table(10, start='2026-04-06')
+
+
+def edit(frame, day, **values):
+    out = frame.copy()
+    hit = out['ProductionDate'] == day
+    for col, value in values.items():
+        out.loc[hit, col] = value
+    return out
+
+
+def test_tokens_ignore_spelling_differences_between_sheet_and_snapshot():
+    header = ['ProductionDate', 'DailyProductionTotal', 'NoOfTrials', 'ProductionIssues_1', 'YearlyProductionTotal']
+    sheet = ['04/06/2026', '38,600', '', 'NoIssue', '100']
+    snapshot = ['04/06/2026', 38600, 0, '', 999]
+    assert row_token(sheet, header) == row_token(snapshot, header)
+    assert row_token(sheet, header) != row_token(['04/06/2026', 38601, 0, '', 100], header)
+
+
+def test_find_conflicts_names_the_clashing_cells(loaded):
+    ours = edit(loaded, '04/07/2026', NoOfJobs='97')
+    diff = diff_rows(loaded, ours, ALL_COLUMNS)
+    theirs = key_rows(edit(loaded, '04/07/2026', NoOfJobs='55'), ALL_COLUMNS)
+    live = {k: list(v) for k, v in zip(theirs.index, theirs.itertuples(index=False, name=None))}
+
+    conflicts = find_conflicts(diff, live, ALL_COLUMNS)
+    assert list(conflicts[['Column', 'Yours', 'Theirs']].itertuples(index=False, name=None)) == [('NoOfJobs', '97', '55')]
+    assert conflicts.loc[0, 'Problem'] == "changed by someone else"
+
+    del live[diff.updates.index[0]]
+    assert list(find_conflicts(diff, live, ALL_COLUMNS)['Problem']) == ["deleted by someone else"]
+
+
+def test_running_total_shifts_are_not_conflicts(loaded):
+    diff = diff_rows(loaded, edit(loaded, '04/08/2026', NoOfJobs='97'), ALL_COLUMNS)
+    theirs = key_rows(edit(loaded, '04/08/2026', YearlyProductionTotal='123456'), ALL_COLUMNS)
+    live = {k: list(v) for k, v in zip(theirs.index, theirs.itertuples(index=False, name=None))}
+    assert find_conflicts(diff, live, ALL_COLUMNS).empty
+
+
+def sqlite_store(tmp_path, rows):
+    backend = SQLiteBackend(str(tmp_path / 'production.sqlite3'))
+    backend.append(rows)
+    return backend, lambda: backend.read()
+
+
+def sheet_store(tmp_path, rows):
+    ws = LocalWorksheet([ALL_COLUMNS] + rows.astype(str).values.tolist())
+
+    class Store:
+        def apply(self, diff, header):
+            apply_row_diff(ws, diff, header)
+
+    return Store(), lambda: pd.DataFrame(ws.rows[1:], columns=ws.rows[0])
+
+
+@pytest.fixture(params=[sqlite_store, sheet_store], ids=['sqlite', 'local-sheet'])
+def store(request, tmp_path, loaded):
+    return request.param(tmp_path, loaded)
+
+
+def test_saves_to_different_rows_merge(store, loaded):
+    backend, read = store
+    backend.apply(diff_rows(loaded, edit(loaded, '04/06/2026', NoOfJobs='11'), ALL_COLUMNS), ALL_COLUMNS)
+    # The second operator still holds the original snapshot
+    backend.apply(diff_rows(loaded, edit(loaded, '04/09/2026', NoOfJobs='22'), ALL_COLUMNS), ALL_COLUMNS)
+    jobs = read().set_index('ProductionDate')['NoOfJobs'].astype(str)
+    assert jobs['04/06/2026'] == '11' and jobs['04/09/2026'] == '22'
+
+
+def test_saves_to_the_same_row_conflict_and_keep_the_first(store, loaded):
+    backend, read = store
+    backend.apply(diff_rows(loaded, edit(loaded, '04/06/2026', NoOfJobs='11'), ALL_COLUMNS), ALL_COLUMNS)
+    with pytest.raises(ConflictError) as caught:
+        backend.apply(diff_rows(loaded, edit(loaded, '04/06/2026', NoOfJobs='33'), ALL_COLUMNS),
+                      ALL_COLUMNS)
+    assert set(caught.value.conflicts['Column']) == {'NoOfJobs'}
+    assert read().set_index('ProductionDate').loc['04/06/2026', 'NoOfJobs'] in ('11', 11)
+
+
+def test_deleting_a_row_someone_else_changed_conflicts(store, loaded):
+    backend, read = store
+    backend.apply(diff_rows(loaded, edit(loaded, '04/10/2026', NoOfJobs='11'), ALL_COLUMNS), ALL_COLUMNS)
+    stale_delete = diff_rows(loaded, loaded[loaded['ProductionDate'] != '04/10/2026'], ALL_COLUMNS)
+    with pytest.raises(ConflictError):
+        backend.apply(stale_delete, ALL_COLUMNS)
+    assert '04/10/2026' in set(read()['ProductionDate'])
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from data_cache import DataCache
+
+
+class CountingLoader:
+    def __init__(self, frame, delay=0.0):
+        self.frame = frame
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.frame.copy()
+
+
+def test_unchanged_reload_keeps_the_snapshot_and_its_memo():
+    loader = CountingLoader(pd.DataFrame({'a': [1, 2]}))
+    cache = DataCache(loader)
+    first = cache.snapshot()
+    first.memo('answer', lambda: 42)
+    cache.invalidate()
+    second = cache.snapshot()
+    assert loader.calls == 2
+    assert second is first and second.version == 1
+    assert second.memo('answer', lambda: 0) == 42
+
+
+def test_changed_data_gets_a_new_version():
+    loader = CountingLoader(pd.DataFrame({'a': [1, 2]}))
+    cache = DataCache(loader, prepare=lambda df: df.assign(b=df['a'] * 2))
+    assert cache.snapshot().version == 1
+    loader.frame = pd.DataFrame({'a': [1, 2, 3]})
+    cache.invalidate()
+    snapshot = cache.snapshot()
+    assert snapshot.version == 2
+    assert list(snapshot.df['b']) == [2, 4, 6]
+
+
+def test_snapshot_without_invalidate_does_not_reload():
+    loader = CountingLoader(pd.DataFrame({'a': [1]}))
+    cache = DataCache(loader)
+    for _ in range(5):
+        cache.snapshot()
+    assert loader.calls == 1
+
+
+def test_sessions_waiting_on_an_invalidated_cache_share_one_reload():
+    loader = CountingLoader(pd.DataFrame({'a': [1]}), delay=0.05)
+    cache = DataCache(loader)
+    cache.snapshot()
+    cache.invalidate()
+    threads = [threading.Thread(target=cache.snapshot) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.calls == 2
+
+
+def test_invalidate_during_a_load_triggers_another_reload():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) == 1:
+            cache.invalidate()      # a write lands while the first read is in flight
+        return pd.DataFrame({'a': [1]})
+
+    cache = DataCache(loader)
+    cache.snapshot()
+    cache.snapshot()
+    assert len(calls) == 2
+
+
+def test_failed_reload_serves_the_last_good_snapshot_and_backs_off():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError("sheet unavailable")
+        return pd.DataFrame({'a': [len(calls)]})
+
+    cache = DataCache(loader, retry_seconds=60)
+    first = cache.snapshot()
+    cache.invalidate()
+    assert cache.snapshot() is first
+    assert isinstance(cache.last_error, ConnectionError)
+    # Within the backoff window reruns keep the old snapshot without reloading
+    assert cache.snapshot() is first
+    assert len(calls) == 2
+    cache._retry_at = 0.0
+    assert cache.snapshot().version == 2
+    assert cache.last_error is None
+
+
+def test_first_load_failure_is_raised():
+    def loader():
+        raise ConnectionError("sheet unavailable")
+
+    cache = DataCache(loader)
+    with pytest.raises(ConnectionError):
+        cache.snapshot()
+    assert cache.current() is None
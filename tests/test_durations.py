@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from durations import add_duration_seconds, format_duration, malformed_durations, parse_durations
+
+
+@pytest.mark.parametrize('text, seconds', [
+    # Blanks are zero, not malformed
+    ('', 0),
+    (None, 0),
+    (float('nan'), 0),
+    ('nan', 0),
+    # Words
+    ('45 mins', 2700),
+    ('90 minutes', 5400),
+    ('1 hr 30 min', 5400),
+    ('1.5 hrs', 5400),
+    ('2h', 7200),
+    ('  20 min ', 1200),
+    # Clock forms, including str(timedelta)
+    ('0:45:00', 2700),
+    ('1:15:00.5', 4500),
+    ('1 day, 2:00:00', 93600),
+    # Two parts are always m:s, never h:mm
+    ('45:00', 2700),
+    ('1:30', 90),
+    # Bare numbers are minutes
+    ('30', 1800),
+    ('1.5', 90),
+])
+def test_recognised_durations(text, seconds):
+    parsed, malformed = parse_durations([text])
+    assert parsed.tolist() == [seconds]
+    assert malformed == 0
+
+
+@pytest.mark.parametrize('text', ['abc', '-5', '1:2:3:4', '45 secs'])
+def test_unrecognised_durations_are_zero_and_counted(text):
+    parsed, malformed = parse_durations([text])
+    assert parsed.tolist() == [0]
+    assert malformed == 1
+    assert malformed_durations([text]).tolist() == [True]
+
+
+def test_malformed_count_is_per_row_not_per_distinct_value():
+    parsed, malformed = parse_durations(['abc', '45 mins', 'abc', ''])
+    assert parsed.tolist() == [0, 2700, 0, 0]
+    assert malformed == 2
+
+
+def test_seconds_columns_are_added_per_duration_column():
+    frame = pd.DataFrame({'CleanMachineAm': ['45 mins', 'x'], 'IssueResolutionTotal': ['0:04:08', '']})
+    malformed = add_duration_seconds(frame)
+    assert malformed == {'CleanMachineAm': 1, 'IssueResolutionTotal': 0}
+    assert frame['CleanMachineAm_Sec'].tolist() == [2700, 0]
+    assert frame['IssueResolutionTotal_Sec'].tolist() == [248, 0]
+
+
+def test_format_duration():
+    assert format_duration(0) == '0:00:00'
+    assert format_duration(93784) == '26:03:04'
@@ -0,0 +1,56 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from forecast import Targets, compute_forecast
+
+TARGETS = Targets({'default': {'annual': 1_000_000, 'daily': 4000}, 'holidays': ['2025-12-25', '2025-12-26']})
+
+
+def daily(start, end, value, freq='D'):
+    days = pd.date_range(start, end, freq=freq)
+    return pd.Series(float(value), index=days)
+
+
+def test_last_day_of_a_missed_year_needs_no_finite_daily_rate():
+    forecast = compute_forecast(daily('2025-01-01', '2025-12-31', 1000), 2025, TARGETS, as_of='2025-12-31')
+    assert forecast.working_days_left == 0
+    assert np.isinf(forecast.required_daily)
+    assert dict(forecast.metric_rows())["Required per working day"] == "target missed"
+    assert not forecast.on_track
+
+
+def test_last_day_of_a_met_year_requires_nothing():
+    forecast = compute_forecast(daily('2025-01-01', '2025-12-31', 5000), 2025, TARGETS, as_of='2025-12-31')
+    assert forecast.required_daily == 0.0 and forecast.on_track
+    assert forecast.progress > 100
+
+
+def test_holidays_are_not_working_days():
+    forecast = compute_forecast(daily('2025-01-01', '2025-12-31', 1000), 2025, TARGETS, as_of='2025-12-22')
+    # Dec 23, 24, 29, 30, 31: Christmas and Boxing Day are holidays
+    assert forecast.working_days_left == 5
+    assert forecast.working_days_total == 261 - 2
+
+
+def test_a_past_year_is_forecast_as_of_its_last_day():
+    forecast = compute_forecast(daily('2024-01-01', '2024-12-31', 1000), 2024, TARGETS, as_of='2025-06-01')
+    assert forecast.as_of == date(2024, 12, 31)
+    assert forecast.ytd == 366 * 1000
+
+
+def test_future_dates_are_clamped_to_today():
+    today = date.today()
+    series = daily(date(today.year, 1, 1), today, 1000, freq='B')
+    forecast = compute_forecast(series, today.year, TARGETS, as_of=date(today.year, 12, 31))
+    assert forecast.as_of == today
+    # Run rates cover days that happened, not empty future ones
+    assert all(rate == 1000 for rate in forecast.run_rates.values())
+
+
+def test_run_rate_windows_shrink_to_the_days_elapsed():
+    forecast = compute_forecast(daily('2025-01-01', '2025-01-02', 3000), 2025, TARGETS, as_of='2025-01-02')
+    assert forecast.working_days_elapsed == 2
+    assert forecast.run_rates == {7: 3000.0, 28: 3000.0}
+    assert forecast.projected == 6000 + 3000 * forecast.working_days_left
@@ -0,0 +1,26 @@
+from benchmarks.synthetic import generate_production_table
+from issues import IssueIndex, issue_pareto, melt_issues
+from schema import ISSUE_COLUMNS, prepare_frame
+
+
+def with_issues(*records):
+    frame = generate_production_table(len(records), start='2026-03-02')
+    for n, issues in enumerate(records):
+        for col, issue in zip(ISSUE_COLUMNS, list(issues) + ['NoIssue'] * len(ISSUE_COLUMNS)):
+            frame.loc[n, col] = issue
+    return prepare_frame(frame)
+
+
+def test_an_issue_repeated_on_one_record_counts_once():
+    frame = with_issues(['Fire drill', 'Training', 'Fire drill'], [], ['', 'Fire drill'])
+    issues, records = melt_issues(frame)
+    assert len(records) == 3
+    assert sorted(zip(issues['Record'], issues['Issue'].astype(str))) == [
+        (0, 'Fire drill'), (0, 'Training'), (2, 'Fire drill')]
+
+
+def test_pareto_counts_records_not_mentions():
+    frame = with_issues(['Fire drill', 'Fire drill', 'Fire drill'], ['Training'], ['Fire drill'])
+    pareto = issue_pareto(IssueIndex().update(frame))
+    assert pareto['Count'].to_dict() == {'Fire drill': 2, 'Training': 1}
+    assert pareto['CumulativeShare'].iloc[-1] == 1.0
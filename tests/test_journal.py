@@ -0,0 +1,115 @@
+import functools
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from journal import _SCHEMA, CONFLICT, DISCARDED, PENDING, SYNCED, SyncWorker, WriteJournal
+from rollups import push_with_rollups
+from schema import ALL_COLUMNS
+from sheets_io import DuplicateRowError, LocalWorksheet
+
+
+class FlakyWorksheet(LocalWorksheet):
+    down = False
+
+    def get_all_values(self):
+        if self.down:
+            raise ConnectionError("Sheets API unreachable")
+        return super().get_all_values()
+
+
+@pytest.fixture
+def sheet():
+    existing = generate_production_table(3, start='2026-05-04')
+    return FlakyWorksheet([ALL_COLUMNS] + existing.astype(str).values.tolist())
+
+
+@pytest.fixture
+def worker(tmp_path, sheet, sheets_backend):
+    synced = []
+    worker = SyncWorker(WriteJournal(str(tmp_path / 'journal.sqlite3')),
+                        functools.partial(push_with_rollups, sheets_backend(sheet)),
+                        on_synced=lambda: synced.append(True))
+    worker.synced = synced
+    return worker
+
+
+def sheet_dates(sheet):
+    return [row[0] for row in sheet.rows[1:]]
+
+
+def test_rows_wait_in_the_journal_while_the_sheet_is_down(worker, sheet):
+    worker.journal.enqueue(generate_production_table(2, start='2026-05-07'), ALL_COLUMNS)
+    sheet.down = True
+    with pytest.raises(ConnectionError):
+        worker.sync_once()
+    assert worker.journal.status_counts() == {PENDING: 2, SYNCED: 0, CONFLICT: 0}
+    assert [attempts for *_, attempts in worker.journal.pending()] == [1, 1]
+    assert len(sheet.rows) == 4 and not worker.synced
+
+    sheet.down = False
+    assert worker.sync_once() == 2
+    assert worker.journal.status_counts() == {PENDING: 0, SYNCED: 2, CONFLICT: 0}
+    assert sheet_dates(sheet)[-2:] == ['05/07/2026', '05/08/2026']
+    assert worker.synced == [True]
+
+
+def test_a_clashing_row_is_marked_conflict_and_the_rest_sync(worker, sheet):
+    rows = generate_production_table(3, start='2026-05-05')   # 05/05 and 05/06 are already in the sheet
+    worker.journal.enqueue(rows, ALL_COLUMNS)
+    assert worker.sync_once() == 1
+    assert worker.journal.status_counts() == {PENDING: 0, SYNCED: 1, CONFLICT: 2}
+    conflicts = worker.journal.recent()
+    assert set(conflicts.loc[conflicts['status'] == CONFLICT, 'row_key']) == {'05/05/2026', '05/06/2026'}
+    assert sheet_dates(sheet) == ['05/04/2026', '05/05/2026', '05/06/2026', '05/07/2026']
+
+
+def test_sync_is_a_no_op_when_nothing_is_pending(worker, sheet):
+    assert worker.sync_once() == 0
+    assert not worker.synced
+
+
+def test_a_second_pending_entry_for_a_date_is_rejected(worker):
+    entry = generate_production_table(1, start='2026-05-07')
+    worker.journal.enqueue(entry, ALL_COLUMNS)
+    with pytest.raises(DuplicateRowError):
+        worker.journal.enqueue(entry, ALL_COLUMNS)
+    assert worker.journal.status_counts()[PENDING] == 1
+
+
+def test_dates_repeated_within_a_batch_do_not_block_the_queue(worker, sheet):
+    rows = generate_production_table(3, start='2026-05-07')
+    # Same day spelled differently, so the journal's key index lets it through
+    rows.loc[1, 'ProductionDate'] = '5/7/2026'
+    worker.journal.enqueue(rows, ALL_COLUMNS)
+    assert worker.sync_once() == 2
+    assert worker.journal.status_counts() == {PENDING: 0, SYNCED: 2, CONFLICT: 1}
+    assert sheet_dates(sheet)[-2:] == ['05/07/2026', '05/09/2026']
+
+
+def test_conflicts_show_their_values_and_can_be_discarded_or_requeued(worker, sheet):
+    rows = generate_production_table(2, start='2026-05-05')
+    worker.journal.enqueue(rows, ALL_COLUMNS)
+    worker.sync_once()
+    conflicts = worker.journal.recent(status=CONFLICT)
+    assert list(conflicts['row_key']) == ['05/06/2026', '05/05/2026']
+    assert list(conflicts['DailyProductionTotal']) == list(rows['DailyProductionTotal'][::-1])
+
+    first, second = conflicts['id']
+    worker.journal.discard([first])
+    worker.journal.requeue([second])
+    assert worker.journal.status_counts() == {PENDING: 1, SYNCED: 0, CONFLICT: 0}
+    assert worker.journal.recent(status=DISCARDED)['id'].tolist() == [first]
+
+
+def test_duplicate_pending_rows_in_an_older_journal_become_conflicts(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+    with sqlite3.connect(path) as db:
+        db.execute(_SCHEMA)
+        db.executemany("INSERT INTO journal (row_key, header, payload, created_at) VALUES (?, '[]', '[]', 0)",
+                       [('05/07/2026',), ('05/07/2026',), ('05/08/2026',)])
+    db.close()
+    journal = WriteJournal(path)
+    assert journal.status_counts() == {PENDING: 2, SYNCED: 0, CONFLICT: 1}
+    assert [key for _, key, *_ in journal.pending()] == ['05/07/2026', '05/08/2026']
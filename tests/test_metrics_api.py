@@ -0,0 +1,114 @@
+import json
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from data_cache import DataCache
+from forecast import Targets
+from metrics_api import MetricsApi, start_metrics_api
+from schema import prepare_frame
+
+
+class Loader:
+    def __init__(self):
+        self.frame = generate_production_table(400, start='2025-06-01')
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.frame.copy()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(metrics_api):
+        server = start_metrics_api(metrics_api, host='127.0.0.1', port=0)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def api(serve):
+    loader = Loader()
+    cache = DataCache(loader, prepare=prepare_frame)
+    return cache, loader, serve(MetricsApi(cache, targets=Targets()))
+
+
+def get(url, etag=None):
+    request = urllib.request.Request(url, headers={'If-None-Match': etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_unchanged_data_answers_304_until_it_changes(api):
+    cache, loader, base = api
+    cache.refresh()
+    status, headers, body = get(f"{base}/metrics?year=2025")
+    assert status == 200
+    assert json.loads(body)['ytd']['Production'] == loader.frame.loc[
+        loader.frame['TempDate'] < '2026', 'DailyProductionTotal'].astype(int).sum()
+    etag = headers['ETag']
+
+    status, headers, body = get(f"{base}/series?year=2025&granularity=Month", etag)
+    assert status == 304 and body == b'' and headers['ETag'] == etag
+
+    loader.frame = loader.frame.iloc[:-1]
+    cache.refresh()
+    status, headers, _ = get(f"{base}/metrics?year=2025", etag)
+    assert status == 200 and headers['ETag'] != etag and headers['X-Data-Version'] == '2'
+
+
+def test_requests_never_read_storage(api):
+    cache, loader, base = api
+    cache.refresh()
+    for path in ('/metrics', '/series?granularity=Week', '/issues?freq=M&top=3', '/health'):
+        assert get(base + path)[0] == 200
+    assert loader.calls == 1
+
+
+def test_bad_queries_get_a_400_with_the_reason(api):
+    cache, _, base = api
+    cache.refresh()
+    status, _, body = get(f"{base}/series?granularity=Hour")
+    assert status == 400 and 'granularity' in json.loads(body)['error']
+    status, _, body = get(f"{base}/metrics?year=last")
+    assert status == 400 and 'year' in json.loads(body)['error']
+    assert get(f"{base}/totals")[0] == 404
+
+
+def test_nothing_is_served_before_the_first_load(api):
+    cache, loader, base = api
+    assert get(f"{base}/metrics")[0] == 503
+    assert json.loads(get(f"{base}/health")[2])['version'] == 0
+    assert loader.calls == 0
+
+
+def test_edited_targets_change_the_etag_and_the_forecast(serve, tmp_path):
+    path = tmp_path / 'targets.json'
+    path.write_text(json.dumps({'default': {'annual': 9680000, 'daily': 38600}}))
+    cache = DataCache(Loader(), prepare=prepare_frame)
+    cache.refresh()
+    base = serve(MetricsApi(cache, targets_path=str(path)))
+    status, headers, body = get(f"{base}/metrics?year=2025")
+    assert json.loads(body)['forecast']['daily_target'] == 38600
+    etag = headers['ETag']
+    assert get(f"{base}/metrics?year=2025", etag)[0] == 304
+
+    path.write_text(json.dumps({'default': {'annual': 9680000, 'daily': 40000}}))
+    mtime = os.stat(path).st_mtime_ns + 10**9     # coarse filesystem clocks
+    os.utime(path, ns=(mtime, mtime))
+    status, headers, body = get(f"{base}/metrics?year=2025", etag)
+    assert status == 200 and headers['ETag'] != etag
+    assert json.loads(body)['forecast']['daily_target'] == 40000
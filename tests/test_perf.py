@@ -0,0 +1,29 @@
+from perf import DISABLED_RUN, PerfRecorder
+
+
+def test_fragment_runs_are_recorded_under_their_own_name():
+    recorder = PerfRecorder()
+    page = recorder.start_run(True)
+    page.lap("chart")
+    page.finish()
+
+    fragment = recorder.start_run(True, total="fragment: production_chart")
+    with fragment.span("plotly_chart"):
+        pass
+    fragment.finish()
+
+    summary = recorder.summary().set_index('span')
+    assert recorder.runs == 2
+    assert summary.loc['total', 'runs'] == 1
+    assert summary.loc['fragment: production_chart', 'runs'] == 1
+    assert summary.loc['plotly_chart', 'calls'] == 1
+
+
+def test_disabled_runs_record_nothing():
+    recorder = PerfRecorder()
+    run = recorder.start_run(False, total="fragment: production_chart")
+    assert run is DISABLED_RUN
+    with run.span("plotly_chart"):
+        pass
+    run.finish()
+    assert recorder.runs == 0 and recorder.summary().empty
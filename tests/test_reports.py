@@ -0,0 +1,47 @@
+from datetime import date
+
+from benchmarks.synthetic import generate_production_table
+from data_cache import Snapshot
+from forecast import Targets
+from paging import sorted_by_date
+from reports import get_report_summary, period_bounds, render_html, summarize
+from schema import prepare_frame
+
+
+def snapshot_of(rows):
+    return Snapshot(prepare_frame(rows), version=1, fingerprint='test')
+
+
+def test_period_bounds():
+    assert [d.day for d in period_bounds('week', '2025-06-12')] == [9, 15]
+    assert [d.day for d in period_bounds('month', '2025-02-12')] == [1, 28]
+
+
+def test_summary_totals_match_the_rows_in_the_period():
+    raw = generate_production_table(90, start='2025-05-01')
+    rows = sorted_by_date(prepare_frame(raw.copy()))
+    summary = summarize(rows, 'month', '2025-06-15')
+    june = raw[raw['TempDate'].str.startswith('2025-06')]
+    assert summary.totals['Production'] == june['DailyProductionTotal'].astype(int).sum()
+    assert summary.totals['Days'] == 30 and len(summary.daily) == 30
+    assert summary.title == "Monthly Report: June 2025"
+    assert "<svg" in render_html(summary)
+
+
+def test_edited_targets_are_not_served_from_the_memo():
+    snapshot = snapshot_of(generate_production_table(200, start='2025-01-01'))
+    low = Targets({'default': {'annual': 1_000_000, 'daily': 4000}})
+    high = Targets({'default': {'annual': 20_000_000, 'daily': 80000}})
+    first = get_report_summary(snapshot, 'month', '2025-06-15', low)
+    assert get_report_summary(snapshot, 'month', '2025-06-15', low) is first
+    second = get_report_summary(snapshot, 'month', '2025-06-15', high)
+    assert second.forecast.annual_target == 20_000_000
+    assert second.forecast.progress < first.forecast.progress
+
+
+def test_a_running_period_is_forecast_as_of_today():
+    today = date.today()
+    raw = generate_production_table((today - date(today.year, 1, 1)).days + 1, start=f'{today.year}-01-01')
+    summary = summarize(sorted_by_date(prepare_frame(raw)), 'month', today, Targets())
+    assert summary.end.date() >= today
+    assert summary.forecast.as_of == today
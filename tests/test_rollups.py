@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from journal import PENDING, SyncWorker, WriteJournal
+from rollups import ROLLUP_COLUMNS, push_with_rollups, rollup_insert, with_rollups
+from schema import ALL_COLUMNS
+from sheets_io import ConflictError, DuplicateRowError, RowDiff
+from storage import SQLiteBackend
+
+
+def stored_totals(backend):
+    rows = backend.read()
+    return rows.set_index('ProductionDate')[list(ROLLUP_COLUMNS)].astype('int64')
+
+
+def expected_totals(backend):
+    rows = with_rollups(backend.read())
+    return rows.set_index('ProductionDate')[list(ROLLUP_COLUMNS)].astype('int64')
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'production.sqlite3'))
+    days = generate_production_table(30, start='2026-03-02')
+    # Leave gaps to backdate into: 03/04 and 03/10
+    days = days[~days['ProductionDate'].isin(['03/04/2026', '03/10/2026'])]
+    backend.append(with_rollups(days))
+    return backend
+
+
+def test_backdated_insert_shifts_every_later_total(backend):
+    entry = generate_production_table(1, start='2026-03-04')
+    push_with_rollups(backend, entry, ALL_COLUMNS)
+    assert len(backend.read()) == 29
+    pd.testing.assert_frame_equal(stored_totals(backend), expected_totals(backend))
+
+
+def test_entries_queued_before_a_sync_see_each_other(backend, tmp_path):
+    worker = SyncWorker(WriteJournal(str(tmp_path / 'journal.sqlite3')),
+                        lambda rows, header: push_with_rollups(backend, rows, header))
+    # Two backdated submits queued before the worker runs; neither saw the other
+    worker.journal.enqueue(generate_production_table(1, start='2026-03-10'), ALL_COLUMNS)
+    worker.journal.enqueue(generate_production_table(1, start='2026-03-04', seed=1), ALL_COLUMNS)
+    assert worker.sync_once() == 2
+    pd.testing.assert_frame_equal(stored_totals(backend), expected_totals(backend))
+
+
+def test_a_failed_sync_keeps_the_entry_and_its_ripple_for_the_retry(backend, tmp_path, monkeypatch):
+    worker = SyncWorker(WriteJournal(str(tmp_path / 'journal.sqlite3')),
+                        lambda rows, header: push_with_rollups(backend, rows, header))
+    worker.journal.enqueue(generate_production_table(1, start='2026-03-04'), ALL_COLUMNS)
+    def offline(diff, header):
+        raise ConnectionError("storage unreachable")
+
+    monkeypatch.setattr(backend, 'apply', offline)
+    with pytest.raises(ConnectionError):
+        worker.sync_once()
+    assert worker.journal.status_counts()[PENDING] == 1
+    monkeypatch.undo()
+    assert worker.sync_once() == 1
+    pd.testing.assert_frame_equal(stored_totals(backend), expected_totals(backend))
+
+
+def test_a_repeated_push_is_skipped_and_a_different_row_clashes(backend):
+    entry = generate_production_table(1, start='2026-03-04')
+    push_with_rollups(backend, entry, ALL_COLUMNS)
+    push_with_rollups(backend, entry, ALL_COLUMNS)
+    assert len(backend.read()) == 29
+    other = entry.assign(DailyProductionTotal='1')
+    with pytest.raises(DuplicateRowError):
+        push_with_rollups(backend, other, ALL_COLUMNS)
+
+
+def test_a_ripple_from_a_stale_snapshot_does_not_overwrite_other_edits(backend):
+    stale = backend.read()
+    # Someone else edits a later row after our snapshot was taken
+    edited = stale[stale['ProductionDate'] == '03/20/2026'].assign(NoOfJobs='99')
+    backend.upsert(edited, ALL_COLUMNS)
+
+    filled, ripple = rollup_insert(stale, generate_production_table(1, start='2026-03-04'), ALL_COLUMNS)
+    assert len(ripple.updates) and set(ripple.base) == set(ripple.updates.index)
+    with pytest.raises(ConflictError) as caught:
+        backend.apply(RowDiff(filled, ripple.updates, [], ripple.base), ALL_COLUMNS)
+    assert '03/20/2026' in set(backend.read().loc[lambda r: r['NoOfJobs'] == '99', 'ProductionDate'])
+    assert set(caught.value.conflicts['Column']) == {'NoOfJobs'}
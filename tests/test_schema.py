@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_production_table
+from schema import DERIVED_COLUMNS, normalize_frame, prepare_frame, to_sheet_frame
+
+
+def normalized(**columns):
+    frame = pd.DataFrame({'ProductionDate': ['03/02/2026'] * len(next(iter(columns.values()))), **columns})
+    normalize_frame(frame)
+    return frame
+
+
+@pytest.mark.parametrize('raw, value', [
+    ('', 0),
+    (None, 0),
+    ('abc', 0),
+    ('7', 7),
+    ('12.6', 13),
+    ('2.4', 2),
+])
+def test_counts_are_coerced_and_rounded(raw, value):
+    frame = normalized(NoOfJobs=[raw])
+    assert frame['NoOfJobs'].tolist() == [value]
+    assert frame['NoOfJobs'].dtype == 'int16'
+
+
+def test_formatted_totals_are_read_as_numbers():
+    frame = normalized(DailyProductionTotal=['38,600', '1,234,567', 40109])
+    assert frame['DailyProductionTotal'].tolist() == [38600, 1234567, 40109]
+
+
+def test_counts_that_do_not_fit_are_widened():
+    frame = normalized(NoOfJobs=['40000', '1'])
+    assert frame['NoOfJobs'].tolist() == [40000, 1]
+    assert frame['NoOfJobs'].dtype == 'int64'
+
+
+@pytest.mark.parametrize('raw, value', [('', 'NoIssue'), (None, 'NoIssue'), ('Fire drill', 'Fire drill'),
+                                        ('Old free text', 'Old free text')])
+def test_blank_issues_become_no_issue(raw, value):
+    frame = normalized(ProductionIssues_1=[raw])
+    assert frame['ProductionIssues_1'].tolist() == [value]
+    assert isinstance(frame['ProductionIssues_1'].dtype, pd.CategoricalDtype)
+
+
+def test_weekday_flags_round_trip_as_one_or_blank():
+    frame = normalized(Monday=['1', ''], Tuesday=['', '1'])
+    assert frame['Monday'].tolist() == [1, 0]
+    back = to_sheet_frame(frame)
+    assert back['Monday'].tolist() == [1, '']
+    assert back['Tuesday'].tolist() == ['', 1]
+
+
+def test_normalize_then_to_sheet_frame_round_trips():
+    raw = generate_production_table(200)
+    frame = prepare_frame(raw.copy())
+    assert frame.attrs['memory_report']['bytes_after'] < frame.attrs['memory_report']['bytes_before']
+
+    back = to_sheet_frame(frame)
+    assert list(back.columns) == list(raw.columns)
+    assert not set(DERIVED_COLUMNS) & set(back.columns)
+    pd.testing.assert_frame_equal(back.astype(str), raw.astype(str))
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from benchmarks.synthetic import generate_production_table
+from schema import ALL_COLUMNS
+from sheets_io import LocalWorksheet, apply_row_diff, diff_rows
+
+
+class RecordingWorksheet(LocalWorksheet):
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.batches = []
+
+    def batch_update(self, body):
+        self.batches.append([next(iter(request)) for request in body['requests']])
+        super().batch_update(body)
+
+
+def sheet_of(frame):
+    return [list(frame.columns)] + frame.astype(str).values.tolist()
+
+
+def test_a_diff_is_written_as_one_batch_of_pasted_rows():
+    before = generate_production_table(5, start='2026-03-02')
+    ws = RecordingWorksheet(sheet_of(before))
+    after = before.copy()
+    after.loc[1, 'DailyProductionTotal'] = '12345'
+    after.loc[2, 'IssueResolutionTotal'] = '1:15:00'
+    after = after.drop(index=4)
+    extra = generate_production_table(1, start='2026-03-09')
+    after = pd.concat([after, extra], ignore_index=True)
+
+    apply_row_diff(ws, diff_rows(before, after, ALL_COLUMNS), ALL_COLUMNS)
+
+    # One atomic request; pasted rows are parsed by Sheets like typed input
+    assert ws.batches == [['pasteData', 'pasteData', 'deleteDimension', 'insertDimension', 'pasteData']]
+    live = pd.DataFrame(ws.rows[1:], columns=ws.rows[0])
+    assert list(live['ProductionDate']) == ['03/02/2026', '03/03/2026', '03/04/2026', '03/05/2026', '03/09/2026']
+    assert live.loc[1, 'DailyProductionTotal'] == '12345'
+    assert live.loc[2, 'IssueResolutionTotal'] == '1:15:00'
+
+
+def test_appends_land_below_the_last_row_and_ignore_blank_grid_rows():
+    before = generate_production_table(2, start='2026-03-02')
+    ws = LocalWorksheet(sheet_of(before) + [[''] * len(ALL_COLUMNS)] * 3)
+    after = pd.concat([before, generate_production_table(2, start='2026-03-04')], ignore_index=True)
+
+    apply_row_diff(ws, diff_rows(before, after, ALL_COLUMNS), ALL_COLUMNS)
+
+    assert [row[0] for row in ws.rows[1:5]] == ['03/02/2026', '03/03/2026', '03/04/2026', '03/05/2026']
+    assert len(ws.rows) == 8
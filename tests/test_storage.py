@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from archive import ArchiveStore
+from benchmarks.synthetic import generate_production_table
+from config import READ_ONLY_YEARS
+from schema import ALL_COLUMNS
+from sheets_io import LocalWorksheet, LockedRowError, RowDiff, key_rows
+from storage import PartitionedBackend, SQLiteBackend
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'production.sqlite3'))
+    backend.append(generate_production_table(40, start='2025-12-10'))    # 2025-12-10 .. 2026-01-18
+    return backend
+
+
+@pytest.fixture
+def partitioned(sqlite, tmp_path):
+    backend = PartitionedBackend(sqlite, ArchiveStore(str(tmp_path / 'archive')), current_year=2026)
+    backend.read()      # freezes 2025
+    return backend
+
+
+def test_configured_years_stay_locked_without_the_archive(sqlite):
+    assert sqlite.locked_years() == READ_ONLY_YEARS
+    assert sqlite.frozen_years() == []
+
+
+def test_archive_adds_frozen_years_to_the_locked_ones(partitioned):
+    assert partitioned.frozen_years() == [2025]
+    assert partitioned.locked_years() == sorted(set(READ_ONLY_YEARS) | {2025})
+    with pytest.raises(LockedRowError):
+        entry = key_rows(generate_production_table(1, start='2024-06-03'), ALL_COLUMNS)
+        partitioned.apply(RowDiff(entry, entry.iloc[:0], []), ALL_COLUMNS)
+
+
+def test_live_ranges_are_pushed_down_to_the_live_backend(partitioned, monkeypatch):
+    def no_full_reads():
+        raise AssertionError("query_range fell back to a full read")
+
+    monkeypatch.setattr(partitioned.live, 'read', no_full_reads)
+    live = partitioned.query_range('2026-01-05', '2026-01-11')
+    assert list(live['ProductionDate']) == [f'01/{d:02d}/2026' for d in range(5, 12)]
+
+    spanning = partitioned.query_range('2025-12-29', '2026-01-02')
+    assert list(pd.to_datetime(spanning['ProductionDate']).dt.day) == [29, 30, 31, 1, 2]
+
+
+def test_archived_ranges_never_touch_the_live_backend(partitioned, monkeypatch):
+    monkeypatch.setattr(partitioned.live, 'query_range', lambda *a: pytest.fail("live backend queried"))
+    rows = partitioned.query_range('2025-12-20', '2025-12-24')
+    assert len(rows) == 5
+
+
+def test_sheets_ranges_read_only_below_the_archive_boundary(sheets_backend, tmp_path):
+    rows = generate_production_table(40, start='2025-12-10')
+    sheet = LocalWorksheet([list(rows.columns)] + rows.values.tolist())
+    live = sheets_backend(sheet)
+    partitioned = PartitionedBackend(live, ArchiveStore(str(tmp_path / 'archive')), current_year=2026)
+    partitioned.read()      # freezes 2025 with one full read
+    assert live.conn.full_reads == 1
+
+    week = partitioned.query_range('2026-01-05', '2026-01-11')
+    assert list(week['ProductionDate']) == [f'01/{d:02d}/2026' for d in range(5, 12)]
+    assert live.conn.full_reads == 1